@@ -2,17 +2,16 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import datetime
-import math 
-import plotly.graph_objs as go
 import altair as alt
-import time 
-from typing import Dict, List, Tuple, Union, Any
+from typing import Dict, List, Any, Tuple
 import base64
+import csv
+import io
+from dataclasses import fields
+from functools import partial
 
 # Import helpers
 from helpers.linear_indicator import create_linear_indicator
-from helpers.balance_display import display_balances
-from helpers.inputs_to_df import create_parameters_dataframe
 from helpers.styling import (tab_style_css, button_style_css, 
                            download_button_style_css, 
                            remove_top_white_space,
@@ -37,7 +36,76 @@ from helpers.help_texts import (simulation_help_text, smile_help_text,
 
 # Import simulation module with our new refactored function
 from simulations.simulation_mc_rf import SimulationConfig, monte_carlo_simulation
-from simulations.tax_master_data import contribution_limits
+from simulations.tax_master_data import contribution_limits, catchup_age_401k
+
+# App-wide CSS (buttons, spacing and the input form tabs), joined once at import so
+# each rerun injects it with a single element
+APP_STYLE_CSS = button_style_css + download_button_style_css + remove_top_white_space + tab_style_css
+
+# Maximum yearly 401(k) contribution, indexed by whether the catch-up allowance applies
+MAX_401K_CONTRIBUTION = (
+    contribution_limits["401k"]["2025"],
+    contribution_limits["401k"]["2025"] + contribution_limits["catch_up"]["2025"],
+)
+
+# Cash flow columns formatted as currency / as percentages in the cash flow table
+CASHFLOW_MONETARY_COLUMNS = frozenset([
+    'beginning_balance', 'ending_balance', 'end_value_constant_currency', 'portfolio_draw', 
+    'income_self_earnings', 'income_partner_earnings', 
+    'income_self_social_security', 'income_partner_social_security',
+    'income_self_pension', 'income_partner_pension', 'income_rental',
+    'expenses_basic', 'expenses_mortgage', 'expenses_self_healthcare', 
+    'expenses_partner_healthcare', 'expenses_one_time',
+    'investment_return_self_401k', 'investment_return_partner_401k',
+    'investment_return_roth_ira', 'investment_return_brokerage',
+    'investment_return_cash', 'investment_return_total', 'tax', 
+    'draws_self_401k', 'draws_partner_401k', 'draws_roth_ira',
+    'draws_brokerage', 'draws_cash', 'draws_total',
+    'account_balances_self_401k', 'account_balances_partner_401k',
+    'account_balances_roth_ira', 'account_balances_brokerage',
+    'account_balances_cash', 'self_contribution', 'partner_contribution',
+    'downsize_proceeds', 'windfall_amount', 'expense_adjustment'
+])
+CASHFLOW_PERCENTAGE_COLUMNS = frozenset(['return_rate', 'withdrawal_rate'])
+
+# Cash flow columns highlighted green/red by sign in the cash flow table
+CASHFLOW_HIGHLIGHT_COLUMNS = ('beginning_balance', 'ending_balance', 'investment_return_total', 'return_rate')
+
+# Columns an uploaded parameter file must contain
+REQUIRED_PARAMETER_COLUMNS = (
+    "current_age", "partner_current_age", "life_expectancy", "retirement_age",
+    "partner_retirement_age", "initial_savings", "stock_percentage", "bond_percentage",
+    "annual_earnings", "self_yearly_increase", "partner_earnings", "partner_yearly_increase", 
+    "annual_pension", "partner_pension", "self_pension_yearly_increase","partner_pension_yearly_increase", 
+    "rental_start", "rental_end", "rental_amt", "rental_yearly_increase",      
+    "self_401k_balance", "partner_401k_balance",
+    "roth_ira_balance", "cash_savings_balance", "brokerage_balance",
+    "self_401k_contribution", "partner_401k_contribution", "employer_self_401k_contribution",
+    "employer_partner_401k_contribution", "maximize_self_contribution", "maximize_partner_contribution",
+    # Tax columns ...
+    "filing_status", "state_of_residence", "tax_rate",
+    "tax_rate_both_working", "tax_rate_one_retired", "tax_rate_both_retired",
+    #
+    "annual_expense", "mortgage_payment", "inflation_mean",
+    "annual_expense_decrease", "mortgage_years_remaining", "inflation_std",
+    "annual_social_security", "withdrawal_start_age", "cola_rate",
+    "partner_social_security", "partner_withdrawal_start_age",
+    "self_healthcare_cost", "self_healthcare_start_age",
+    "partner_healthcare_cost", "partner_healthcare_start_age",
+    "stock_return_mean", "bond_return_mean", "simulations",
+    "stock_return_std", "bond_return_std", "years_until_downsize",
+    "residual_amount", "adjust_expense_year_1", "adjust_expense_amount_1",
+    "adjust_expense_year_2", "adjust_expense_amount_2",
+    "adjust_expense_year_3", "adjust_expense_amount_3",
+    "one_time_year_1", "one_time_amount_1",
+    "one_time_year_2", "one_time_amount_2",
+    "one_time_year_3", "one_time_amount_3",
+    "windfall_year_1", "windfall_amount_1",
+    "windfall_year_2", "windfall_amount_2",
+    "windfall_year_3", "windfall_amount_3", 
+    "simulation_type"
+)
+REQUIRED_PARAMETER_COLUMN_SET = frozenset(REQUIRED_PARAMETER_COLUMNS)
 
 
 def main():
@@ -56,18 +124,15 @@ def main():
     config = create_input_form(parameters)
     
     # Show download and run buttons
-    params_df = create_parameters_dataframe_from_config(config)
-    run_button, auto_run = display_action_buttons(params_df)
+    params = create_parameters_from_config(config)
+    run_button, auto_run = display_action_buttons(params)
     
-    # Show spinner 
-    with st.spinner("Simulating..."):
-
-        # Run simulation if triggered
-        if should_run_simulation(run_button, auto_run):
-            run_simulation(config)
-            time.sleep(1)
+    # Run simulation if triggered (the cached runner shows the spinner only when
+    # it actually simulates - unchanged parameters return the stored results at once)
+    if should_run_simulation(run_button, auto_run, config):
+        run_simulation(config)
         
-        # Display results if simulation has been run
+    # Display results if simulation has been run
     display_results()
     st.markdown("<br><br><br><br>", unsafe_allow_html=True)
 
@@ -81,10 +146,9 @@ def setup_app():
     layout="wide"
     )
     
-    # Apply CSS styling
-    st.markdown(button_style_css, unsafe_allow_html=True)
-    st.markdown(download_button_style_css, unsafe_allow_html=True)
-    st.markdown(remove_top_white_space, unsafe_allow_html=True)
+    # Apply CSS styling (Streamlit drops elements a rerun doesn't emit, so the styles
+    # are re-sent every run - but as one prebuilt block rather than three)
+    st.markdown(APP_STYLE_CSS, unsafe_allow_html=True)
     
     # Create columns for title and help link
     col1, col2 = st.columns([5, 1])
@@ -112,58 +176,37 @@ def load_parameters_from_upload() -> Dict[str, Any]:
         return None
         
     try:
-        params_df = pd.read_csv(uploaded_file)
-        
-        # Validate the DataFrame
-        required_columns = get_required_columns()
+        # The uploader hands back the same file on every rerun - parse it once per content
+        parameters, missing_columns = parse_parameter_file(uploaded_file.getvalue())
         
-        if not all(col in params_df.columns for col in required_columns):
-            st.error("Uploaded file is missing one or more required columns.")
-            return None
+        if missing_columns:
+            st.error(f"Uploaded file is missing required columns: {', '.join(missing_columns)}")
             
-        # Convert DataFrame to dictionary
-        return params_df.iloc[0].to_dict()
+        return parameters
         
     except Exception as e:
         st.error(f"Error loading parameters: {e}")
         return None
 
 
-def get_required_columns() -> List[str]:
-    """Get list of required columns for parameter file"""
-    return [
-        "current_age", "partner_current_age", "life_expectancy", "retirement_age",
-        "partner_retirement_age", "initial_savings", "stock_percentage", "bond_percentage",
-        "annual_earnings", "self_yearly_increase", "partner_earnings", "partner_yearly_increase", 
-        "annual_pension", "partner_pension", "self_pension_yearly_increase","partner_pension_yearly_increase", 
-        "rental_start", "rental_end", "rental_amt", "rental_yearly_increase",      
-        "self_401k_balance", "partner_401k_balance",
-        "roth_ira_balance", "cash_savings_balance", "brokerage_balance",
-        "self_401k_contribution", "partner_401k_contribution", "employer_self_401k_contribution",
-        "employer_partner_401k_contribution", "maximize_self_contribution", "maximize_partner_contribution",
-        # Tax columns ...
-        "filing_status", "state_of_residence", "tax_rate",
-        "tax_rate_both_working", "tax_rate_one_retired", "tax_rate_both_retired",
-        #
-        "annual_expense", "mortgage_payment", "inflation_mean",
-        "annual_expense_decrease", "mortgage_years_remaining", "inflation_std",
-        "annual_social_security", "withdrawal_start_age", "cola_rate",
-        "partner_social_security", "partner_withdrawal_start_age",
-        "self_healthcare_cost", "self_healthcare_start_age",
-        "partner_healthcare_cost", "partner_healthcare_start_age",
-        "stock_return_mean", "bond_return_mean", "simulations",
-        "stock_return_std", "bond_return_std", "years_until_downsize",
-        "residual_amount", "adjust_expense_year_1", "adjust_expense_amount_1",
-        "adjust_expense_year_2", "adjust_expense_amount_2",
-        "adjust_expense_year_3", "adjust_expense_amount_3",
-        "one_time_year_1", "one_time_amount_1",
-        "one_time_year_2", "one_time_amount_2",
-        "one_time_year_3", "one_time_amount_3",
-        "windfall_year_1", "windfall_amount_1",
-        "windfall_year_2", "windfall_amount_2",
-        "windfall_year_3", "windfall_amount_3", 
-        "simulation_type"
-    ]
+@st.cache_data(show_spinner=False, max_entries=8)
+def parse_parameter_file(file_bytes):
+    """Parse an uploaded parameter CSV into a dict, cached on the file contents
+
+    Returns the parameters and the sorted list of missing required columns -
+    the parameters are None when any required column is missing.
+    """
+    # Only the first row is used, so don't parse anything past it
+    params_df = pd.read_csv(io.BytesIO(file_bytes), nrows=1)
+    
+    # Validate the DataFrame
+    missing_columns = sorted(REQUIRED_PARAMETER_COLUMN_SET.difference(params_df.columns))
+    
+    if missing_columns:
+        return None, missing_columns
+        
+    # Convert DataFrame to dictionary
+    return params_df.iloc[0].to_dict(), missing_columns
 
 
 def create_input_form(parameters: Dict[str, Any]) -> SimulationConfig:
@@ -173,8 +216,7 @@ def create_input_form(parameters: Dict[str, Any]) -> SimulationConfig:
     
     # Set up the tabbed container
     with st.container(height=315, border=None):
-        # Set the tab styles 
-        st.markdown(tab_style_css, unsafe_allow_html=True)
+        # Tab styles are injected with the app-wide CSS in setup_app
         
         # Create tabs for different parameter categories
         tabs = create_tabs()
@@ -187,8 +229,9 @@ def create_input_form(parameters: Dict[str, Any]) -> SimulationConfig:
         current_age, partner_current_age, retirement_age, partner_retirement_age, life_expectancy = create_profile_tab(
             tabs[0], parameters)
             
-        # Now we can set the valid years range
-        years_range = list(range(current_year, current_year + (life_expectancy - current_age) + 1))
+        # Now we can set the valid years range (a range object - selectbox options, `in`
+        # and .index() all work on it without materializing a list)
+        years_range = range(current_year, current_year + (life_expectancy - current_age) + 1)
         
         # Tab 2: Savings & Investments
         (self_401k_balance, partner_401k_balance, roth_ira_balance, cash_savings_balance, 
@@ -261,13 +304,13 @@ def create_input_form(parameters: Dict[str, Any]) -> SimulationConfig:
         (enable_sequence_risk, seq_risk_years, seq_risk_returns) = stress_test_params
     
     
-    # Create lists for special events
-    adjust_expense_years = [adjust_expense_year_1, adjust_expense_year_2, adjust_expense_year_3]
-    adjust_expense_amounts = [adjust_expense_amount_1, adjust_expense_amount_2, adjust_expense_amount_3]
-    one_time_years = [one_time_year_1, one_time_year_2, one_time_year_3]
-    one_time_amounts = [one_time_amount_1, one_time_amount_2, one_time_amount_3]
-    windfall_years = [windfall_year_1, windfall_year_2, windfall_year_3]
-    windfall_amounts = [windfall_amount_1, windfall_amount_2, windfall_amount_3]
+    # Create tuples for special events (the config is immutable)
+    adjust_expense_years = (adjust_expense_year_1, adjust_expense_year_2, adjust_expense_year_3)
+    adjust_expense_amounts = (adjust_expense_amount_1, adjust_expense_amount_2, adjust_expense_amount_3)
+    one_time_years = (one_time_year_1, one_time_year_2, one_time_year_3)
+    one_time_amounts = (one_time_amount_1, one_time_amount_2, one_time_amount_3)
+    windfall_years = (windfall_year_1, windfall_year_2, windfall_year_3)
+    windfall_amounts = (windfall_amount_1, windfall_amount_2, windfall_amount_3)
     
     # Create and return the SimulationConfig object
     return SimulationConfig(
@@ -365,6 +408,19 @@ def create_input_form(parameters: Dict[str, Any]) -> SimulationConfig:
     )
 
 
+def year_index(years_range, year_value, default=0):
+    """Position of year_value in the consecutive years_range, or default when it's not in it
+
+    The years are consecutive, so the position is plain arithmetic - no scan, and it works
+    for numpy/float years read from an uploaded file as well as for ints.
+    """
+    try:
+        index = int(year_value) - years_range.start
+    except (TypeError, ValueError):
+        return default
+    return index if 0 <= index < len(years_range) else default
+
+
 def create_tabs():
     """Create the tabbed UI structure"""
     return st.tabs([
@@ -434,11 +490,10 @@ def create_savings_tab(tab, parameters):
                 value=parameters["stock_percentage"] if parameters else 60)
             bond_percentage = 100 - stock_percentage
         with col5:
-            # Calculate total investments
+            # Calculate total investments (the stock/bond split is applied to returns
+            # by the simulation, so only the total is needed here)
             total_investment = (self_401k_balance + roth_ira_balance +
                              partner_401k_balance + brokerage_balance)
-            stock_amount = total_investment * (stock_percentage / 100)
-            bond_amount = total_investment * (bond_percentage / 100)
 
             # Display totals
             st.write(f"Investments : {total_investment:,.0f}")
@@ -481,13 +536,9 @@ def create_income_tab(tab, parameters, years_range):
             default_index = 0
             
             # If parameters exist, find the matching index
-            if parameters and years_range:
-                try:
-                    rental_start_index = years_range.index(parameters["rental_start"])
-                    rental_end_index = years_range.index(parameters["rental_end"])
-                except ValueError:
-                    rental_start_index = 0
-                    rental_end_index = 0
+            if parameters:
+                rental_start_index = year_index(years_range, parameters["rental_start"])
+                rental_end_index = year_index(years_range, parameters["rental_end"])
             else:
                 rental_start_index = 0
                 rental_end_index = 0
@@ -523,10 +574,7 @@ def create_contribution_tab(tab, parameters, current_age, partner_current_age):
                 value=(parameters["maximize_self_contribution"] if parameters else False))
             
             if maximize_self_contribution:
-                if current_age < 50:
-                    self_401k_contribution = contribution_limits["401k"]["2025"]
-                else:
-                    self_401k_contribution = contribution_limits["401k"]["2025"] + contribution_limits["catch_up"]["2025"]
+                self_401k_contribution = MAX_401K_CONTRIBUTION[current_age >= catchup_age_401k]
             
             st.write(f"Your Contribution: {self_401k_contribution:,.0f}")
             
@@ -535,10 +583,7 @@ def create_contribution_tab(tab, parameters, current_age, partner_current_age):
                 value=(parameters["maximize_partner_contribution"] if parameters else False))
             
             if maximize_partner_contribution:
-                if partner_current_age < 50:
-                    partner_401k_contribution = contribution_limits["401k"]["2025"]
-                else:
-                    partner_401k_contribution = contribution_limits["401k"]["2025"] + contribution_limits["catch_up"]["2025"]
+                partner_401k_contribution = MAX_401K_CONTRIBUTION[partner_current_age >= catchup_age_401k]
             
             st.write(f"Partner's Contribution: {partner_401k_contribution:,.0f}")
             
@@ -756,11 +801,9 @@ def create_adjust_expense_tab(tab, parameters, years_range):
     with tab:
         col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
         
-        # Find indexes in years_range if parameters exist
+        # Find indexes in years_range if parameters exist (arithmetic on the consecutive years)
         def get_year_index(year_value):
-            if parameters and year_value in years_range:
-                return years_range.index(year_value)
-            return 0
+            return year_index(years_range, year_value) if parameters else 0
         
         with col1:
             adjust_expense_year_1 = st.selectbox("Year of Adjustment 1", years_range, 
@@ -792,11 +835,9 @@ def create_one_time_tab(tab, parameters, years_range):
     with tab:
         col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
         
-        # Find indexes in years_range if parameters exist
+        # Find indexes in years_range if parameters exist (arithmetic on the consecutive years)
         def get_year_index(year_value):
-            if parameters and year_value in years_range:
-                return years_range.index(year_value)
-            return 0
+            return year_index(years_range, year_value) if parameters else 0
         
         with col1:
             one_time_year_1 = st.selectbox("Year of One-Time Expense 1", years_range, 
@@ -829,11 +870,9 @@ def create_windfall_tab(tab, parameters, years_range):
     with tab:
         col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
         
-        # Find indexes in years_range if parameters exist
+        # Find indexes in years_range if parameters exist (arithmetic on the consecutive years)
         def get_year_index(year_value):
-            if parameters and year_value in years_range:
-                return years_range.index(year_value)
-            return 0
+            return year_index(years_range, year_value) if parameters else 0
         
         with col1:
             windfall_year_1 = st.selectbox("Year of Windfall 1", years_range, 
@@ -942,7 +981,7 @@ def create_simulation_parameters_tab(tab, parameters, years_range):
                         value=collar_min_return * 100, step=1.0
                     ) / 100
                     # Start year
-                    start_idx = years_range.index(collar_start_year) if (years_range and collar_start_year in years_range) else 0
+                    start_idx = year_index(years_range, collar_start_year)
                     collar_start_year = st.selectbox(
                         "Start Year", options=years_range, index=start_idx, key="collar_start_year"
                     )
@@ -953,7 +992,7 @@ def create_simulation_parameters_tab(tab, parameters, years_range):
                         value=collar_max_return * 100, step=1.0
                     ) / 100
                     # End year
-                    end_idx = years_range.index(collar_end_year) if (years_range and collar_end_year in years_range) else (len(years_range)-1 if years_range else 0)
+                    end_idx = year_index(years_range, collar_end_year, default=max(len(years_range) - 1, 0))
                     collar_end_year = st.selectbox(
                         "End Year", options=years_range, index=end_idx, key="collar_end_year"
                     )
@@ -1029,17 +1068,17 @@ def create_stress_tests_tab(tab, parameters, years_range=None):
 
 
 
-def create_parameters_dataframe_from_config(config):
-    """Convert SimulationConfig to a DataFrame for saving/sharing"""
+def create_parameters_from_config(config):
+    """Convert SimulationConfig to a dict of parameter columns for saving/sharing"""
     # Extract special events lists into individual items
-    adjust_expense_year_1, adjust_expense_year_2, adjust_expense_year_3 = (config.adjust_expense_years + [0, 0, 0])[:3]
-    adjust_expense_amount_1, adjust_expense_amount_2, adjust_expense_amount_3 = (config.adjust_expense_amounts + [0, 0, 0])[:3]
+    adjust_expense_year_1, adjust_expense_year_2, adjust_expense_year_3 = (config.adjust_expense_years + (0, 0, 0))[:3]
+    adjust_expense_amount_1, adjust_expense_amount_2, adjust_expense_amount_3 = (config.adjust_expense_amounts + (0, 0, 0))[:3]
     
-    one_time_year_1, one_time_year_2, one_time_year_3 = (config.one_time_years + [0, 0, 0])[:3]
-    one_time_amount_1, one_time_amount_2, one_time_amount_3 = (config.one_time_amounts + [0, 0, 0])[:3]
+    one_time_year_1, one_time_year_2, one_time_year_3 = (config.one_time_years + (0, 0, 0))[:3]
+    one_time_amount_1, one_time_amount_2, one_time_amount_3 = (config.one_time_amounts + (0, 0, 0))[:3]
     
-    windfall_year_1, windfall_year_2, windfall_year_3 = (config.windfall_years + [0, 0, 0])[:3]
-    windfall_amount_1, windfall_amount_2, windfall_amount_3 = (config.windfall_amounts + [0, 0, 0])[:3]
+    windfall_year_1, windfall_year_2, windfall_year_3 = (config.windfall_years + (0, 0, 0))[:3]
+    windfall_amount_1, windfall_amount_2, windfall_amount_3 = (config.windfall_amounts + (0, 0, 0))[:3]
     
     # Create a dictionary with all parameters
     params_dict = {
@@ -1139,15 +1178,23 @@ def create_parameters_dataframe_from_config(config):
         "windfall_amount_3": windfall_amount_3
     }
     
-    # Return as DataFrame with one row
-    return pd.DataFrame([params_dict])
+    return params_dict
+
 
+def parameters_to_csv(params):
+    """Serialize the parameter dict as a one-row CSV (header line + value line)
 
-def display_action_buttons(params_df):
+    Written in a single pass with the csv module - same output as a one-row
+    DataFrame.to_csv(index=False), without building the DataFrame.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerows((params.keys(), params.values()))
+    return buffer.getvalue()
+
+
+def display_action_buttons(params):
     """Display download parameters button and run simulation button"""
-    # Convert DataFrame to CSV
-    csv = params_df.to_csv(index=False)
-    
     # Create columns for the buttons
     col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 2, 2])
     
@@ -1156,11 +1203,12 @@ def display_action_buttons(params_df):
         st.download_button(
             label="Save Parameters",
             key="parameter_download",
-            data=csv,
+            data=partial(parameters_to_csv, params),  # serialized to CSV only when clicked
             file_name="retirement_parameters.csv",
             mime="text/csv",
             type="primary",
-            icon=":material/download:"
+            icon=":material/download:",
+            on_click="ignore"  # downloading needs no script rerun
         )
     
     # Run simulation button
@@ -1174,18 +1222,35 @@ def display_action_buttons(params_df):
     return run_button, auto_run
 
 
-def should_run_simulation(run_button, auto_run):
+def should_run_simulation(run_button, auto_run, config):
     """Determine if the simulation should be run"""
     # Initialize the simulation state if it doesn't exist
     if 'simulation_initialized' not in st.session_state:
         st.session_state.simulation_initialized = False
     
-    # Run if button is clicked, auto-run is checked, or first time running
+    # Run if button is clicked, first time running, or auto-run is checked and a
+    # parameter changed - reruns from tab switches, downloads etc. keep the shown results
     return (run_button or 
-            auto_run or 
+            (auto_run and config != st.session_state.get('simulation_config')) or 
             not st.session_state.simulation_initialized)
 
 
+@st.cache_data(show_spinner="Simulating...", max_entries=16)
+def run_monte_carlo_cached(config_key, _config):
+    """Run the Monte Carlo simulation, cached on the flat tuple of config values
+
+    Identical parameter sets return the stored results instead of re-simulating.
+    The config itself is excluded from hashing (leading underscore) - config_key
+    carries the same values without the dataclass-to-dict conversion.
+    """
+    return monte_carlo_simulation(_config)
+
+
+def simulation_cache_key(config):
+    """Return every SimulationConfig value, in field order, as one immutable tuple"""
+    return tuple(getattr(config, field.name) for field in fields(config))
+
+
 def run_simulation(config):
     """Run the Monte Carlo simulation and store results in session state"""
     # Initialize the simulation results storage
@@ -1193,17 +1258,26 @@ def run_simulation(config):
         st.session_state.simulation_results = {
             'success_count': 0,
             'failure_count': 0,
-            'sorted_simulation_results': []
+            'results': None
         }
     
-    # Run simulation with the new refactored function
-    success_count, failure_count, sorted_simulation_results = monte_carlo_simulation(config)
+    # Inputs unchanged since the stored run - keep those results (and the frames
+    # derived from them) instead of simulating again
+    config_key = hash(config)
+    if (st.session_state.simulation_results.get('config_key') == config_key and
+            st.session_state.get('simulation_config') == config):
+        st.session_state.simulation_initialized = True
+        return
+
+    # Run simulation with the new refactored function (cached on the config)
+    success_count, failure_count, results = run_monte_carlo_cached(simulation_cache_key(config), config)
     
-    # Store the results in session state
+    # Store the results in session state, keyed by the hash of their inputs
     st.session_state.simulation_results = {
         'success_count': success_count,
         'failure_count': failure_count,
-        'sorted_simulation_results': sorted_simulation_results
+        'results': results,
+        'config_key': config_key
     }
 
     # Persist config so we can show parameter banner in results
@@ -1253,23 +1327,31 @@ def display_results():
     # Extract results
     success_count = st.session_state.simulation_results['success_count']
     failure_count = st.session_state.simulation_results['failure_count']
-    sorted_simulation_results = st.session_state.simulation_results['sorted_simulation_results']
+    results = st.session_state.simulation_results['results']
     
-    # Calculate success rate
+    # Calculate success rate as a whole (floored) percentage using integer arithmetic
     total_simulations = success_count + failure_count
-    success_rate = (success_count / total_simulations) * 100 if total_simulations > 0 else 0
+    success_rate = (success_count * 100) // total_simulations if total_simulations > 0 else 0
     
     # Store in session for use elsewhere (e.g., parameter banner)
     st.session_state['success_rate'] = success_rate
 
     # Display success rate indicator
-    st.markdown(create_linear_indicator(math.floor(success_rate), "Success Rate: "), unsafe_allow_html=True)
-    
-    # Process simulation results for percentile scenarios
-    processed_results = process_percentile_scenarios(sorted_simulation_results)
+    st.markdown(create_linear_indicator(success_rate, "Success Rate: "), unsafe_allow_html=True)
+    
+    # Process simulation results for percentile scenarios - the processed frames and the
+    # summary table HTML only change when the simulation inputs change, so build them
+    # once per input hash and reuse them across reruns
+    results_key = st.session_state.simulation_results.get('config_key')
+    if st.session_state.get('processed_results_key') != results_key:
+        st.session_state.processed_results = process_percentile_scenarios(results)
+        st.session_state.ending_balance_summary_html = build_ending_balance_summary(
+            st.session_state.processed_results, st.session_state.get('simulation_config'))
+        st.session_state.processed_results_key = results_key
+    processed_results = st.session_state.processed_results
     
     # Display ending balance summary
-    display_ending_balance_summary(processed_results, st.session_state.get('simulation_config'))
+    st.markdown(st.session_state.ending_balance_summary_html, unsafe_allow_html=True)
     
     # Call the function where you want to display the PDF
         # Display detailed scenario analysis
@@ -1285,10 +1367,10 @@ def display_results():
     display_percentile_tabs(processed_results)
 
 
-def process_percentile_scenarios(sorted_simulation_results):
+def process_percentile_scenarios(simulation_results):
     """Process simulation results to extract percentile scenarios"""
     # Calculate indices for percentiles
-    n = len(sorted_simulation_results)
+    n = len(simulation_results)
     percentiles = {
         "10th": int(0.1 * n),
         "25th": int(0.25 * n),
@@ -1296,48 +1378,54 @@ def process_percentile_scenarios(sorted_simulation_results):
         "75th": int(0.75 * n)
     }
     
+    # Rank only the simulations needed for the percentiles instead of sorting all of them
+    percentiles = {percentile: index for percentile, index in percentiles.items() if index > 0 and index <= n}
+    sim_ids = simulation_results.ranked_ids([index - 1 for index in percentiles.values()])
+
     # Extract cash flows for each percentile
     results = {}
-    for percentile, index in percentiles.items():
-        # Get the simulation ID for this percentile
-        if index > 0 and index <= len(sorted_simulation_results):
-            sim_id = sorted_simulation_results[index - 1]["simulation_id"]
-            
-            # Extract cash flows
-            cash_flows = []
-            for sim in sorted_simulation_results:
-                if sim["simulation_id"] == sim_id:
-                    cash_flows = sim["cash_flows"]
-                    break
-                    
-            # Create a DataFrame from the cash flows
-            df_original = pd.DataFrame(cash_flows)
-            
-            # Flatten the nested structure
-            df_values = flatten_nested_dataframe(df_original)
-
-            # Reorder columns for better display
-            df_values = reorder_columns(df_values)
-
-            # Calculate year of depletion
-            year_of_depletion = "Surplus at plan end"
-            if not df_values.empty and 'ending_balance' in df_values.columns:
-                negative_years = df_values[df_values['ending_balance'] < 0]
-                if not negative_years.empty:
-                    year_of_depletion = str(negative_years['year'].iloc[0])
-            
-            # Format the data for display
-            df_formatted = format_cashflow_dataframe(df_values.copy())
-            
-            # Get the ending balance
-            ending_balance = df_values['ending_balance'].iloc[-1] if not df_values.empty else 0
-            
-            results[percentile] = {
-                "df_values": df_values,
-                "df_formatted": df_formatted,
-                "ending_balance": ending_balance,
-                "year_of_depletion": year_of_depletion
-            }
+    processed_by_id = {}
+    for percentile, sim_id in zip(percentiles, sim_ids):
+        # With few simulations several percentiles can land on the same path - process it once
+        if sim_id in processed_by_id:
+            results[percentile] = dict(processed_by_id[sim_id])
+            continue
+
+        # Cash flow columns of this simulation
+        columns = simulation_results.cash_flows(sim_id)
+        
+        # Add return and withdrawal rates
+        columns = add_derived_metrics(columns)
+
+        # Reorder columns for better display, then build the DataFrame once from the column dict
+        df_values = pd.DataFrame(reorder_columns(columns))
+
+        # Calculate year of depletion
+        year_of_depletion = "Surplus at plan end"
+        if not df_values.empty and 'ending_balance' in df_values.columns:
+            # First negative year straight from a boolean mask, without filtering the frame
+            negative = df_values['ending_balance'].to_numpy() < 0
+            if negative.any():
+                year_of_depletion = str(df_values['year'].iat[int(negative.argmax())])
+        
+        # Get the ending balance
+        ending_balance = df_values['ending_balance'].iloc[-1] if not df_values.empty else 0
+
+        # Effective (geometric) rate of return, from the usual approximation
+        # arithmetic mean - variance / 2 of the yearly return rates
+        geometric_mean = None
+        if 'return_rate' in df_values.columns and len(df_values) > 1:
+            return_rates = df_values['return_rate'].to_numpy(dtype=float)
+            geometric_mean = return_rates.mean() - return_rates.var(ddof=1) / 2
+        
+        results[percentile] = {
+            "df_values": df_values,
+            "style_columns": [col for col in CASHFLOW_HIGHLIGHT_COLUMNS if col in df_values.columns],
+            "ending_balance": ending_balance,
+            "year_of_depletion": year_of_depletion,
+            "geometric_mean_value": geometric_mean
+        }
+        processed_by_id[sim_id] = results[percentile]
     
     return results
 
@@ -1348,42 +1436,21 @@ def convert_to_dict_for_display(cash_flow):
     return cash_flow
 
 
-def format_cashflow_dataframe(df):
-    """Format the cash flow DataFrame for display"""
-    if df.empty:
-        return df
-    
-    # List of columns that should be formatted as currency
-    monetary_columns = [
-        'beginning_balance', 'ending_balance', 'end_value_constant_currency', 'portfolio_draw', 
-        'income_self_earnings', 'income_partner_earnings', 
-        'income_self_social_security', 'income_partner_social_security',
-        'income_self_pension', 'income_partner_pension', 'income_rental',
-        'expenses_basic', 'expenses_mortgage', 'expenses_self_healthcare', 
-        'expenses_partner_healthcare', 'expenses_one_time',
-        'investment_return_self_401k', 'investment_return_partner_401k',
-        'investment_return_roth_ira', 'investment_return_brokerage',
-        'investment_return_cash', 'investment_return_total', 'tax', 
-        'draws_self_401k', 'draws_partner_401k', 'draws_roth_ira',
-        'draws_brokerage', 'draws_cash', 'draws_total',
-        'account_balances_self_401k', 'account_balances_partner_401k',
-        'account_balances_roth_ira', 'account_balances_brokerage',
-        'account_balances_cash', 'self_contribution', 'partner_contribution',
-        'downsize_proceeds', 'windfall_amount', 'expense_adjustment'
-    ]
-    
-    # Format monetary columns
-    for col in monetary_columns:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: f"{x:,.0f}" if pd.notnull(x) else "")
-    
-    # Format percentage columns
-    percentage_columns = ['return_rate', 'withdrawal_rate']
-    for col in percentage_columns:
-        if col in df.columns:
-            df[col] = df[col].apply(lambda x: f"{x*100:.2f}%" if pd.notnull(x) else "")
+def cashflow_column_config(df):
+    """Return st.dataframe column formats for the cash flow columns present in the DataFrame
+
+    Formatting happens in the browser, so the underlying data stays numeric and no
+    per-cell format call runs in Python.
+    """
+    # Currency columns
+    column_config = {col: st.column_config.NumberColumn(format='%,.0f')
+                     for col in df.columns if col in CASHFLOW_MONETARY_COLUMNS}
+
+    # Percentage columns
+    column_config.update({col: st.column_config.NumberColumn(format='percent')
+                          for col in df.columns if col in CASHFLOW_PERCENTAGE_COLUMNS})
     
-    return df
+    return column_config
 
 def generate_parameter_summary(config):
     """Generate a summary of simulation parameters for display"""
@@ -1393,7 +1460,7 @@ def generate_parameter_summary(config):
     if success_rate is not None:
         summary = (
             f"<span style='font-size:16px; font-weight:700;'>"
-            f"Success Rate: {math.floor(success_rate):.0f}%  |  </span>"
+            f"Success Rate: {success_rate}%  |  </span>"
         )
 
 
@@ -1434,31 +1501,40 @@ def generate_parameter_summary(config):
     return summary
 
 
-def display_ending_balance_summary(processed_results, config):
-    """Display a summary of ending balances for each percentile"""
+def build_ending_balance_summary(processed_results, config):
+    """Build the HTML summary table of ending balances for each percentile"""
     # Calculate inflation adjustment for ending balances
     years = st.session_state.get('years_in_simulation', 30)
     inflation_mean = 0.025  # Default if not available
 
-    # Calculate the return statistics for each percentile
-    for percentile in ['10th', '25th', '50th', '75th']:
-        df = processed_results[percentile]['df_values']
-        if 'return_rate' in df.columns:
+    # Calculate the return statistics for all percentiles at once - the yearly
+    # return rates are stacked into one (percentiles, years) array and reduced along axis 1
+    percentiles = ['10th', '25th', '50th', '75th']
+    with_returns = [p for p in percentiles if 'return_rate' in processed_results[p]['df_values'].columns]
+    if with_returns:
+        return_rates = np.vstack([
+            processed_results[p]['df_values']['return_rate'].to_numpy(dtype=float) for p in with_returns
+        ])
+        median_returns = np.median(return_rates, axis=1)
+        positive_counts = np.count_nonzero(return_rates > 0, axis=1)
+        negative_counts = np.count_nonzero(return_rates <= 0, axis=1)
+
+    for percentile in percentiles:
+        if percentile in with_returns:
+            i = with_returns.index(percentile)
+
             # Calculate median return rate
-            median_return = df['return_rate'].median()
+            median_return = median_returns[i]
             processed_results[percentile]['median_return_rate'] = f"{median_return * 100:.2f}%"
 
-            # Calculate arithmetic mean and standard deviation
-            arithmetic_mean = df['return_rate'].mean()
-            std_dev = df['return_rate'].std()            
-
-            # Calculate geometric mean using the provided formula
-            geometric_mean = arithmetic_mean - (arithmetic_mean ** 2) / 2
-            processed_results[percentile]['geometric_mean'] = f"{geometric_mean * 100:.2f}%"
+            # Geometric mean (computed with the scenario in process_percentile_scenarios)
+            geometric_mean = processed_results[percentile]['geometric_mean_value']
+            processed_results[percentile]['geometric_mean'] = (
+                "N/A" if geometric_mean is None else f"{geometric_mean * 100:.2f}%")
 
             # Count years with positive and negative returns
-            positive_years = (df['return_rate'] > 0).sum()
-            negative_years = (df['return_rate'] <= 0).sum()
+            positive_years = int(positive_counts[i])
+            negative_years = int(negative_counts[i])
             total_years = positive_years + negative_years
 
             processed_results[percentile]['positive_return_years'] = positive_years
@@ -1468,6 +1544,7 @@ def display_ending_balance_summary(processed_results, config):
             # Default values if return_rate isn't available
             processed_results[percentile]['median_return_rate'] = "N/A"
             processed_results[percentile]['geometric_mean'] = "N/A"
+            processed_results[percentile]['geometric_mean_value'] = None
             processed_results[percentile]['positive_return_years'] = 0
             processed_results[percentile]['negative_return_years'] = 0
             processed_results[percentile]['negative_return_formatted'] = "N/A"
@@ -1476,7 +1553,6 @@ def display_ending_balance_summary(processed_results, config):
     def _last_year_total_expense_incl_tax(df_):
         if df_ is None or df_.empty:
             return float('nan')
-        last = df_.iloc[-1]
         components = [
             'expenses_basic',
             'expenses_mortgage',
@@ -1485,18 +1561,14 @@ def display_ending_balance_summary(processed_results, config):
             'expenses_one_time',
             'tax'
         ]
-        total = 0.0
-        for c in components:
-            if c in df_.columns and pd.notnull(last[c]):
-                total += float(last[c])
-        return total
+        # One vectorized row sum over the available components (missing values skipped)
+        return float(df_[[c for c in components if c in df_.columns]].iloc[-1].sum())
 
     def _withdrawal_rate_stats(df_):
         if df_ is None or df_.empty or 'withdrawal_rate' not in df_.columns:
             return "N/A"
         wr = df_['withdrawal_rate']
-        wr = wr[pd.notnull(wr)]
-        # Exclude non-draw years (optional, keeps numbers meaningful)
+        # Exclude non-draw years (optional, keeps numbers meaningful) - NaN fails the test too
         wr = wr[wr > 0]
         if wr.empty:
             return "N/A"
@@ -1514,6 +1586,17 @@ def display_ending_balance_summary(processed_results, config):
         cushion_years[p] = "N/A" if (pd.isna(cushion) or cushion <= 0) else f"{cushion:.1f} yrs of expense"
         wr_stats[p] = _withdrawal_rate_stats(dfp)
 
+    # Discount factor to today's dollars, computed once for all scenarios
+    discount = (1 + inflation_mean) ** years
+
+    # Summary column title, percentile key and percentile label for each scenario
+    scenario_columns = [
+        ("Significantly Below Historical Avg. Returns", '10th', "Top 90% Scenarios"),
+        ("Below Historical Average Returns", '25th', "Top 75% Scenarios"),
+        ("Historical Average Returns", '50th', "Top 50% Scenarios"),
+        ("Above Historical Average Returns", '75th', "Top 25% Scenarios"),
+    ]
+
     # Prepare the data for the grid (added Cushion Years and Withdrawal Rate rows)
     data = {
         "Scenarios": [
@@ -1526,91 +1609,44 @@ def display_ending_balance_summary(processed_results, config):
             # "Negative Returns", 
             "Simulation Percentile"
         ],
-        "Significantly Below Historical Avg. Returns": [
-            f"{processed_results['10th']['ending_balance'] / 1_000_000:,.2f}M",
-            f"{processed_results['10th']['ending_balance'] / ((1 + inflation_mean) ** years) / 1_000_000:,.2f}M", 
-            cushion_years['10th'],
-            wr_stats['10th'],
-            processed_results['10th']['year_of_depletion'],
-            processed_results['10th']['geometric_mean'],
-            # processed_results['10th']['negative_return_formatted'],
-            "Top 90% Scenarios"
-        ],
-        "Below Historical Average Returns": [
-            f"{processed_results['25th']['ending_balance'] / 1_000_000:,.2f}M",
-            f"{processed_results['25th']['ending_balance'] / ((1 + inflation_mean) ** years) / 1_000_000:,.2f}M",
-            cushion_years['25th'],
-            wr_stats['25th'],
-            processed_results['25th']['year_of_depletion'],
-            processed_results['25th']['geometric_mean'],
-            # processed_results['25th']['negative_return_formatted'],
-            "Top 75% Scenarios"
-        ],
-        "Historical Average Returns": [
-            f"{processed_results['50th']['ending_balance'] / 1_000_000:,.2f}M",
-            f"{processed_results['50th']['ending_balance'] / ((1 + inflation_mean) ** years) / 1_000_000:,.2f}M",
-            cushion_years['50th'],
-            wr_stats['50th'],
-            processed_results['50th']['year_of_depletion'],
-            processed_results['50th']['geometric_mean'],
-            # processed_results['50th']['negative_return_formatted'],
-            "Top 50% Scenarios"
-        ],
-        "Above Historical Average Returns": [
-            f"{processed_results['75th']['ending_balance'] / 1_000_000:,.2f}M",
-            f"{processed_results['75th']['ending_balance'] / ((1 + inflation_mean) ** years) / 1_000_000:,.2f}M",
-            cushion_years['75th'],
-            wr_stats['75th'],
-            processed_results['75th']['year_of_depletion'],
-            processed_results['75th']['geometric_mean'],
-            # processed_results['75th']['negative_return_formatted'],
-            "Top 25% Scenarios"
-        ]
+        **{
+            column: [
+                f"{processed_results[p]['ending_balance'] / 1_000_000:,.2f}M",
+                f"{processed_results[p]['ending_balance'] / discount / 1_000_000:,.2f}M",
+                cushion_years[p],
+                wr_stats[p],
+                processed_results[p]['year_of_depletion'],
+                processed_results[p]['geometric_mean'],
+                # processed_results[p]['negative_return_formatted'],
+                percentile_label
+            ]
+            for column, p, percentile_label in scenario_columns
+        }
     }
     
     # Create a DataFrame and apply styling
     df = pd.DataFrame(data)
     
-    styles = pd.DataFrame(
-        '',
-        index=df.index,
-        columns=df.columns
-    )
-    
-    # Apply styles based on values
-    for i, row in enumerate(df.index):
-        for j, col in enumerate(df.columns):
-            value = df.iloc[i, j]
-            
-            # Skip the first column (headers)
-            if j == 0:
-                continue
-                
-            # For Year of Depletion (row index 2)
-            if i == 4:
-                if value == "Surplus at plan end":
-                    styles.iloc[i, j] = 'color: green; font-weight: bold;'
-                else:
-                    styles.iloc[i, j] = 'color: red; font-weight: bold;'
-            # For currency values (rows 0 and 1)
-            elif i < 2:
-                try:
-                    if isinstance(value, str) and 'M' in value:
-                        numeric_value = float(value.replace('M', ''))
-                        color = 'red' if numeric_value < 0 else 'green'
-                        styles.iloc[i, j] = f'color: {color}; font-weight: bold;'
-                except:
-                    pass
-            # For Rate rows with % (row index 3 remains effective return)
-            elif i == 5:
-                try:
-                    if isinstance(value, str) and '%' in value:
-                        numeric_value = float(value.replace('%', ''))
-                        color = 'red' if numeric_value < 0 else 'green'
-                        styles.iloc[i, j] = f'color: {color}; font-weight: bold;'
-                except:
-                    pass
-            # Leave Cushion Years and Withdrawal Rate rows unstyled by default
+    # Styles come from the raw numbers of all scenarios at once (one entry per scenario
+    # column), not by parsing the formatted cells one by one
+    scenario_keys = [p for _, p, _ in scenario_columns]
+    ending_balances = np.array([processed_results[p]['ending_balance'] for p in scenario_keys], dtype=float)
+    surplus = np.array([processed_results[p]['year_of_depletion'] == "Surplus at plan end" for p in scenario_keys])
+    rates = np.array([processed_results[p]['geometric_mean_value'] for p in scenario_keys], dtype=float)
+
+    green = 'color: green; font-weight: bold;'
+    red = 'color: red; font-weight: bold;'
+    styles = np.full(df.shape, '', dtype=object)  # first column (headers) stays unstyled
+
+    # For currency values (rows 0 and 1) - both share the sign of the ending balance
+    styles[0:2, 1:] = np.where(ending_balances < 0, red, green)
+    # For Year of Depletion (row index 4)
+    styles[4, 1:] = np.where(surplus, green, red)
+    # For the effective return row (row index 5) - unstyled when not available
+    styles[5, 1:] = np.where(np.isnan(rates), '', np.where(rates < 0, red, green))
+    # Leave Cushion Years and Withdrawal Rate rows unstyled by default
+
+    styles = pd.DataFrame(styles, index=df.index, columns=df.columns)
 
     # Apply the styles
     styled_df = df.style.apply(lambda _: styles, axis=None)
@@ -1693,53 +1729,67 @@ def display_ending_balance_summary(processed_results, config):
     except Exception:
         pass
 
-    # Display the modified table
-    st.markdown(table_html, unsafe_allow_html=True)
+    # Return the modified table for display
+    return table_html
 
+@st.fragment
 def display_percentile_tabs(processed_results):
-    """Display tabs with detailed cash flow analysis for each percentile"""
+    """Display tabs with detailed cash flow analysis for each percentile
+
+    Runs as a fragment, so switching scenario tabs reruns only this section
+    instead of the whole app.
+    """
 
     content_area, right_spacer = st.columns([9, 2])
 
     with content_area: 
-        # Create tabs for the cash flow summaries
+        # Create tabs for the cash flow summaries - switching tabs reruns the script and
+        # only the selected tab (tab.open) is rendered, so the hidden ones cost nothing
         tab_10th, tab_25th, tab_50th, tab_75th = st.tabs([
             ":material/thunderstorm: Far Below Hist. Avg. Returns", 
             ":material/rainy: Below Average Historical Returns", 
             ":material/partly_cloudy_day: Average Historical Returns", 
             ":material/sunny: Above Historical Average Returns"
-        ])
+        ], key="percentile_tab", on_change="rerun")
         
         # Display each percentile in its tab
         with tab_10th:
-            create_cash_flow_tab(processed_results["10th"]["df_formatted"], 
-                            processed_results["10th"]["df_values"], 
-                            ":material/thunderstorm: With Significantly Below Historical Average Returns",
-                            "download_key_10th")
+            if tab_10th.open:
+                create_cash_flow_tab(processed_results["10th"]["df_values"], 
+                                ":material/thunderstorm: With Significantly Below Historical Average Returns",
+                                "download_key_10th",
+                                processed_results["10th"]["style_columns"])
         
         with tab_25th:
-            create_cash_flow_tab(processed_results["25th"]["df_formatted"], 
-                            processed_results["25th"]["df_values"], 
-                            ":material/rainy: With Below Historical Average Returns",
-                            "download_key_25th"
-                            )
+            if tab_25th.open:
+                create_cash_flow_tab(processed_results["25th"]["df_values"], 
+                                ":material/rainy: With Below Historical Average Returns",
+                                "download_key_25th",
+                                processed_results["25th"]["style_columns"]
+                                )
         
         with tab_50th:
-            create_cash_flow_tab(processed_results["50th"]["df_formatted"], 
-                            processed_results["50th"]["df_values"], 
-                            ":material/partly_cloudy_day: With Average Historical Returns",
-                            "download_key_50th"
-                            )
+            if tab_50th.open:
+                create_cash_flow_tab(processed_results["50th"]["df_values"], 
+                                ":material/partly_cloudy_day: With Average Historical Returns",
+                                "download_key_50th",
+                                processed_results["50th"]["style_columns"]
+                                )
         
         with tab_75th:
-            create_cash_flow_tab(processed_results["75th"]["df_formatted"], 
-                            processed_results["75th"]["df_values"], 
-                            ":material/sunny: With Above Historical Average Returns", 
-                            "download_key_75th"
-                            )
-
-def create_cash_flow_tab(df_cashflow, df_cashflow_value, title, download_button_key):
-    """Create a tab with cash flow details and visualizations"""
+            if tab_75th.open:
+                create_cash_flow_tab(processed_results["75th"]["df_values"], 
+                                ":material/sunny: With Above Historical Average Returns", 
+                                "download_key_75th",
+                                processed_results["75th"]["style_columns"]
+                                )
+
+def create_cash_flow_tab(df_cashflow_value, title, download_button_key, columns_to_style):
+    """Create a tab with cash flow details and visualizations
+
+    columns_to_style are the highlighted columns present in the frame, found once
+    when the scenario is processed.
+    """
     # Display title
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("##### " + title + " details")
@@ -1748,21 +1798,13 @@ def create_cash_flow_tab(df_cashflow, df_cashflow_value, title, download_button_
     # content_area, right_spacer = st.columns([10, 0])
     # with content_area:
 
-    # Apply styling to columns that exist
-    columns_to_style = []
-    target_columns = ['beginning_balance', 'ending_balance', 'investment_return_total', 'return_rate']
-
-    # Only add columns that actually exist in the dataframe
-    for col in target_columns:
-        if col in df_cashflow.columns:
-            columns_to_style.append(col)
-
+    # Number formats are applied by st.dataframe (column_config) in the browser, so the
+    # Styler only carries the highlight colors and the frame stays numeric
+    styled_df = df_cashflow_value.style
     
     # Apply styling
     if columns_to_style:
-        styled_df = df_cashflow.style.apply(highlight_columns, subset=columns_to_style)
-    else:
-        styled_df = df_cashflow.style
+        styled_df = styled_df.apply(highlight_columns, axis=None, subset=columns_to_style)
     
     # Create tabs for visualizations
     tab1, tab2, tab3, tab4 = st.tabs([
@@ -1774,98 +1816,73 @@ def create_cash_flow_tab(df_cashflow, df_cashflow_value, title, download_button_
     
     positive_color = "#55AA55"
     negative_color = "#DD5050"
+
+    # Chart specs are cached per cash flow frame, so reruns reuse them
+    chart_specs = create_cash_flow_chart_specs(df_cashflow_value, positive_color, negative_color)
     
     with tab1: 
 
         # Create portfolio balance chart
-        chart = create_balance_chart(df_cashflow_value, positive_color, negative_color)
-        if chart:
-            st.altair_chart(chart, use_container_width=True)
+        if chart_specs['balance']:
+            st.vega_lite_chart(chart_specs['balance'], use_container_width=True)
     
     with tab2: 
         # Create return chart with actual column names
-        chart = create_return_chart(df_cashflow_value, positive_color, negative_color)
-        if chart:
-            st.altair_chart(chart, use_container_width=True)
+        if chart_specs['return']:
+            st.vega_lite_chart(chart_specs['return'], use_container_width=True)
     
     with tab3: 
         # Create withdrawal chart with actual column names
-        chart = create_withdrawal_chart(df_cashflow_value, positive_color, negative_color)
-        if chart:
-            st.altair_chart(chart, use_container_width=True)
+        if chart_specs['withdrawal']:
+            st.vega_lite_chart(chart_specs['withdrawal'], use_container_width=True)
     
     with tab4: 
         # Display the dataframe
         st.markdown("###### Cashflow ")   
-        st.dataframe(styled_df, hide_index=True, use_container_width=True)
+        st.dataframe(styled_df, hide_index=True, use_container_width=True,
+                     column_config=cashflow_column_config(df_cashflow_value))
 
-        csv1 = df_cashflow_value.to_csv(index=False)
+        # The numeric frame is only serialized to CSV text when the button is clicked
         st.download_button(
             label="Download Cashflow Data",
             key=download_button_key, #key need to be different for each tab
-            data=csv1,
+            data=partial(df_cashflow_value.to_csv, index=False),
             file_name="retirement_cashflow.csv",
             mime="text/csv",
             type="primary",
-            icon=":material/download:"
+            icon=":material/download:",
+            on_click="ignore"  # downloading needs no script rerun
         )           
 
-def flatten_nested_dataframe(df):
+def add_derived_metrics(columns):
     """
-    Flatten a DataFrame with nested dictionaries into a flat DataFrame
-    with individual columns for each nested value.
+    Add return and withdrawal rate columns derived from the yearly balances.
+    Works on the dict of column arrays, before the DataFrame is built.
     """
-    df_flat = df.copy()
-    
-    # Process each nested dictionary column
-    nested_columns = ['income', 'expenses', 'draws', 'investment_return', 'account_balances']
-    
-    for col in nested_columns:
-        if col in df.columns:
-
-            # Extract each nested key as its own column
-            nested_data = df[col].apply(pd.Series)
-            
-            # Add prefix to avoid column name conflicts
-            nested_data = nested_data.add_prefix(f"{col}_")
-            
-            # Drop the original nested column
-            df_flat = df_flat.drop(columns=[col])
-            
-            # Join the flattened columns back to the main dataframe
-            df_flat = pd.concat([df_flat, nested_data], axis=1)
-
-    if 'contributions' in df.columns:
-        try:
-            df_flat['self_contribution'] = df['contributions'].apply(lambda x: x[0] if len(x) > 0 else 0)
-            df_flat['partner_contribution'] = df['contributions'].apply(lambda x: x[1] if len(x) > 1 else 0)
-            df_flat = df_flat.drop(columns=['contributions'])
-        except Exception as e:
-            st.warning(f"Error processing contributions: {e}")
-
     # Calculate useful derived metrics
-    if 'beginning_balance' in df_flat.columns and 'investment_return_total' in df_flat.columns:
-        # Handle division by zero - set return_rate to 0 when beginning_balance is 0
-        df_flat['return_rate'] = np.where(
-            df_flat['beginning_balance'] > 0,  # Condition
-            df_flat['investment_return_total'] / df_flat['beginning_balance'],  # When balance > 0
-            0  # When balance = 0
-        )
-
-    if 'portfolio_draw' in df_flat.columns and 'beginning_balance' in df_flat.columns:
-        # Handle division by zero - set withdrawal_rate to 0 when beginning_balance is 0
-        df_flat['withdrawal_rate'] = np.where(
-            df_flat['beginning_balance'] > 0,  # Condition
-            df_flat['portfolio_draw'] / df_flat['beginning_balance'],  # When balance > 0
-            0  # When balance = 0
-        )
+    # (division by zero is masked out by np.where, so silence its warnings)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if 'beginning_balance' in columns and 'investment_return_total' in columns:
+            # Handle division by zero - set return_rate to 0 when beginning_balance is 0
+            columns['return_rate'] = np.where(
+                columns['beginning_balance'] > 0,  # Condition
+                columns['investment_return_total'] / columns['beginning_balance'],  # When balance > 0
+                0  # When balance = 0
+            )
 
+        if 'portfolio_draw' in columns and 'beginning_balance' in columns:
+            # Handle division by zero - set withdrawal_rate to 0 when beginning_balance is 0
+            columns['withdrawal_rate'] = np.where(
+                columns['beginning_balance'] > 0,  # Condition
+                columns['portfolio_draw'] / columns['beginning_balance'],  # When balance > 0
+                0  # When balance = 0
+            )
 
-    return df_flat
+    return columns
 
-def reorder_columns(df):
+def reorder_columns(columns):
     """
-    Reorder DataFrame columns with specified columns first,
+    Reorder a dict of columns with specified columns first,
     and remaining columns in alphabetical order.
     """
     # Define the desired column order for primary columns
@@ -1918,118 +1935,111 @@ def reorder_columns(df):
         'simulation_id'
     ]
     
-    # Filter the primary columns to only include those that exist in the dataframe
-    ordered_columns = [col for col in primary_columns if col in df.columns]
+    # Filter the primary columns to only include those that exist in the data
+    ordered_columns = [col for col in primary_columns if col in columns]
     
     # Get any remaining columns and sort them alphabetically
-    remaining_columns = [col for col in df.columns if col not in ordered_columns]
+    remaining_columns = [col for col in columns if col not in ordered_columns]
     remaining_columns.sort()  # Sort alphabetically
     
     # Combine primary columns with remaining columns
     final_column_order = ordered_columns + remaining_columns
     
-    # Return a new DataFrame with reordered columns
-    return df[final_column_order]
+    # Return a new dict with reordered columns
+    return {col: columns[col] for col in final_column_order}
 
 
-def create_balance_chart(df, positive_color, negative_color):
-    """Create a chart showing portfolio balance over time in millions"""
-    if 'year' not in df.columns or 'ending_balance' not in df.columns:
-        st.error(f"Cannot create portfolio balance chart: Missing required columns.")
-        return None
-    
-    # Create a copy of the dataframe to avoid modifying the original
-    chart_df = df.copy()
-    
-    # Convert ending_balance to millions
-    chart_df['ending_balance_millions'] = chart_df['ending_balance'] / 1_000_000
-    
-    # Create the base chart with values in millions
-    chart = alt.Chart(chart_df).mark_bar().encode(
+@st.cache_data(show_spinner=False)
+def create_cash_flow_chart_specs(df, positive_color, negative_color):
+    """Build the balance, return and withdrawal chart specs for one cash flow frame (cached)"""
+    # The charts only plot these columns, so share one narrow frame instead of
+    # inlining the full cash flow table into every spec
+    chart_df = df[[col for col in ('year', 'ending_balance', 'return_rate', 'withdrawal_rate')
+                   if col in df.columns]]
+
+    charts = {
+        'balance': create_balance_chart(chart_df, positive_color, negative_color),
+        'return': create_return_chart(chart_df, positive_color, negative_color),
+        'withdrawal': create_withdrawal_chart(chart_df, positive_color, negative_color),
+    }
+    # Serialize once here so cache hits skip both the Altair build and the Vega-Lite conversion
+    return {name: chart.to_dict() if chart else None for name, chart in charts.items()}
+
+
+def create_bar_chart_with_labels(df, field, y_title, chart_title, positive_color, negative_color,
+                                 value_scale=1, label_scale=1, axis_format=None, color_labels=False):
+    """Create a yearly bar chart of one column with value labels above/below each bar
+
+    The plotted value is field * value_scale and the label shows it times label_scale,
+    both computed in Vega so the DataFrame is passed through unchanged.
+    """
+    y_axis = alt.Axis(format=axis_format) if axis_format else alt.Axis()
+
+    chart = alt.Chart(df).transform_calculate(
+        Value=f'datum.{field} * {value_scale}'
+    ).transform_calculate(
+        LabelValue=f'datum.Value * {label_scale}'
+    ).mark_bar().encode(
         x='year:O',
-        y=alt.Y('ending_balance_millions:Q', title='Portfolio Balance (Millions $)'),
+        y=alt.Y('Value:Q', title=y_title, axis=y_axis),
         color=alt.condition(
-            'datum.ending_balance_millions < 0',
+            'datum.Value < 0',
             alt.value(negative_color),
             alt.value(positive_color)
         )
     ).properties(
-        title='Portfolio Balance Over Time'
-    ).transform_calculate(
-        # Create a formatted text field for the labels
-        # FormattedValue='format(datum.ending_balance_millions, ".1f") + "M"'
-        FormattedValue='format(datum.ending_balance_millions, ".1f")'
+        title=chart_title
     )
     
     # Create base text marks
     text = chart.mark_text(align='center', baseline='middle').encode(
-        text='FormattedValue:N'  # Use the formatted value we calculated
+        text=alt.Text('LabelValue:Q', format='.1f')
     )
+
+    # Optionally color the labels like their bars
+    above_color = {'color': positive_color} if color_labels else {}
+    below_color = {'color': negative_color} if color_labels else {}
     
     # Text above positive bars
     textAbove = text.transform_filter(
-        'datum.ending_balance_millions >= 0'
+        'datum.Value >= 0'
     ).mark_text(
-        align='center', 
-        baseline='middle', 
-        fontSize=10, 
-        dy=-10,
-        color=positive_color  # Use the same green color as the bars
+        align='center', baseline='middle', fontSize=10, dy=-10, **above_color
     )
     
     # Text below negative bars
     textBelow = text.transform_filter(
-        'datum.ending_balance_millions < 0'
+        'datum.Value < 0'
     ).mark_text(
-        align='center', 
-        baseline='middle', 
-        fontSize=10, 
-        dy=10,
-        color=negative_color  # Use the same red color as the bars
+        align='center', baseline='middle', fontSize=10, dy=10, **below_color
     )
     
     # Combine chart and text layers
     return chart + textAbove + textBelow
 
 
+def create_balance_chart(df, positive_color, negative_color):
+    """Create a chart showing portfolio balance over time in millions"""
+    if 'year' not in df.columns or 'ending_balance' not in df.columns:
+        st.error(f"Cannot create portfolio balance chart: Missing required columns.")
+        return None
+    
+    return create_bar_chart_with_labels(
+        df, 'ending_balance', 'Portfolio Balance (Millions $)', 'Portfolio Balance Over Time',
+        positive_color, negative_color, value_scale=1e-6, color_labels=True
+    )
+
+
 def create_return_chart(df, positive_color, negative_color):
     """Create a chart showing portfolio returns"""
     if 'year' not in df.columns or 'return_rate' not in df.columns:
         st.error(f"Cannot create return chart: Missing required columns.")
         return None
     
-    chart = alt.Chart(df).mark_bar().encode(
-        x='year:O',
-        y=alt.Y('return_rate:Q', title='Portfolio Return %', axis=alt.Axis(format='%')),
-        color=alt.condition(
-            'datum.return_rate < 0',
-            alt.value(negative_color),
-            alt.value(positive_color)
-        )
-    ).properties(
-        title='Portfolio Return % by Year'
-    ).transform_calculate(
-        ScaledValue='datum.return_rate * 100'
-    )
-    
-    # Create text labels
-    text = chart.mark_text(align='center', baseline='middle').encode(
-        text=alt.Text('ScaledValue:Q', format='.1f')
-    )
-    
-    textAbove = text.transform_filter(
-        'datum.return_rate >= 0'
-    ).mark_text(
-        align='center', baseline='middle', fontSize=10, dy=-10
-    )
-    
-    textBelow = text.transform_filter(
-        'datum.return_rate < 0'
-    ).mark_text(
-        align='center', baseline='middle', fontSize=10, dy=10
+    return create_bar_chart_with_labels(
+        df, 'return_rate', 'Portfolio Return %', 'Portfolio Return % by Year',
+        positive_color, negative_color, label_scale=100, axis_format='%'
     )
-    
-    return chart + textAbove + textBelow
 
 def create_withdrawal_chart(df, positive_color, negative_color):
     """Create a chart showing withdrawal rates"""
@@ -2037,66 +2047,20 @@ def create_withdrawal_chart(df, positive_color, negative_color):
         st.error(f"Cannot create withdrawal chart: Missing required columns.")
         return None
     
-    chart = alt.Chart(df).mark_bar().encode(
-        x='year:O',
-        y=alt.Y('withdrawal_rate:Q', title='Withdrawal Rate %', axis=alt.Axis(format='%')),
-        color=alt.condition(
-            'datum.withdrawal_rate < 0',
-            alt.value(negative_color),
-            alt.value(positive_color)
-        )
-    ).properties(
-        title='Withdrawal Rate % by Year'
-    ).transform_calculate(
-        ScaledValue='datum.withdrawal_rate * 100'
-    )
-    
-    # Create text labels
-    text = chart.mark_text(align='center', baseline='middle').encode(
-        text=alt.Text('ScaledValue:Q', format='.1f')
+    return create_bar_chart_with_labels(
+        df, 'withdrawal_rate', 'Withdrawal Rate %', 'Withdrawal Rate % by Year',
+        positive_color, negative_color, label_scale=100, axis_format='%'
     )
-    
-    textAbove = text.transform_filter(
-        'datum.withdrawal_rate >= 0'
-    ).mark_text(
-        align='center', baseline='middle', fontSize=10, dy=-10
-    )
-    
-    textBelow = text.transform_filter(
-        'datum.withdrawal_rate < 0'
-    ).mark_text(
-        align='center', baseline='middle', fontSize=10, dy=10
-    )
-    
-    return chart + textAbove + textBelow
 
-def highlight_columns(s):
-    """Apply conditional styling to specific columns"""
-    styles = []
-    for value in s:
-        try:
+def highlight_columns(df):
+    """Apply conditional styling to a block of columns at once (expects raw numeric values)"""
+    values = df.to_numpy(dtype=float)
+    styles = np.where(values >= 0,
+                      'background-color: #ECFBEC; font-weight: bold;',  # Green background for positive
+                      'background-color: #F9DFDF; font-weight: bold;')  # Red background for negative
 
-            # Handle the value as string for preprocessing
-            value_str = str(value)
-            
-            # Check if it's a percentage
-            if '%' in value_str:
-                # Remove % sign and convert to float
-                numeric_value = float(value_str.replace('%', ''))
-            else:
-                # Handle monetary or regular number values
-                numeric_value = float(value_str.replace('$', '').replace(',', ''))
-                       
-            # Apply styling based on value
-            if numeric_value >= 0:
-                styles.append('background-color: #ECFBEC; font-weight: bold;')  # Green background for positive
-            else:
-                styles.append('background-color: #F9DFDF; font-weight: bold;')  # Red background for negative
-        except ValueError:
-            # If conversion fails, use default styling
-            styles.append('')
-            
-    return styles
+    # Missing values keep the default styling
+    return pd.DataFrame(np.where(np.isnan(values), '', styles), index=df.index, columns=df.columns)
 
 
 # Run the main app
@@ -1,11 +1,9 @@
+import os
 import numpy as np
-import pandas as pd
-import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from scipy.stats import t
 from dataclasses import dataclass
-from typing import List, Dict, Tuple, Optional, Any
-import copy
+from typing import List, Dict, Tuple, Optional
 
 from simulations.historical_returns import historical_equity_returns, historical_bond_returns
 from simulations.tax_master_data import contribution_limits, catchup_age_401k
@@ -13,11 +11,23 @@ from simulations.tax_master_data import contribution_limits, catchup_age_401k
 
 # Constants
 CASH_ACCOUNT_RETURN_RATE = 0.015  # 1.5%
+SIMULATION_BLOCK_BYTES = 256 * 1024  # target size of one (paths, years) float32 input array per block (~L2)
+MIN_SIMULATION_CHUNK_SIZE = 256  # fewest paths per block, so very long plans still vectorize
 
+# Historical return bounds and lookup arrays - built once at import, not per simulation run
+EQUITY_RETURN_MIN = min(historical_equity_returns.values()) / 100.0
+EQUITY_RETURN_MAX = max(historical_equity_returns.values()) / 100.0
+BOND_RETURN_MIN = min(historical_bond_returns.values()) / 100.0
+BOND_RETURN_MAX = max(historical_bond_returns.values()) / 100.0
 
-@dataclass
+HISTORICAL_EQUITY_RETURNS = np.array(list(historical_equity_returns.values()), dtype=np.float32) / 100
+HISTORICAL_BOND_RETURNS = np.array([historical_bond_returns[year] for year in historical_equity_returns],
+                                   dtype=np.float32) / 100
+
+
+@dataclass(frozen=True)
 class SimulationConfig:
-    """Configuration parameters for the simulation"""
+    """Configuration parameters for the simulation (immutable and hashable)"""
     current_age: int
     partner_current_age: int
     life_expectancy: int
@@ -92,12 +102,12 @@ class SimulationConfig:
     # Special events
     years_until_downsize: int
     residual_amount: float
-    adjust_expense_years: List[int]
-    adjust_expense_amounts: List[float]
-    one_time_years: List[int]
-    one_time_amounts: List[float]
-    windfall_years: List[int]
-    windfall_amounts: List[float]
+    adjust_expense_years: Tuple[int, ...]
+    adjust_expense_amounts: Tuple[float, ...]
+    one_time_years: Tuple[int, ...]
+    one_time_amounts: Tuple[float, ...]
+    windfall_years: Tuple[int, ...]
+    windfall_amounts: Tuple[float, ...]
     
     # Rental income
     rental_start: int
@@ -122,7 +132,7 @@ class SimulationConfig:
 
 @dataclass
 class AccountBalances:
-    """Tracks current balances across different account types"""
+    """Tracks current balances across different account types (one entry per simulation path)"""
     self_401k: float
     partner_401k: float
     roth_ira: float
@@ -199,182 +209,250 @@ class YearlyExpenses:
                 self.one_time)
 
 
-@dataclass
-class YearlyCashFlow:
-    """Complete cash flow for a given year"""
-    year: int
-    self_age: int
-    partner_age: int
-    
-    income: YearlyIncome
-    expenses: YearlyExpenses
-    tax: float
-    
-    beginning_balance: float
-    ending_balance: float
-    end_value_constant_currency: float
-    
-    portfolio_draw: float
-    draws: YearlyDraws
-    
-    investment_return: YearlyReturns
-    
-    # contributions: Tuple[float, float]
-    contributions: List[float]  # list type
+# Per-year cash flow columns recorded for every simulation path
+# (year, ages and the path-independent income/expense schedules are the same
+# for every path and are kept once in the timeline)
+CASH_FLOW_FIELDS = (
+    'beginning_balance', 'ending_balance', 'end_value_constant_currency',
+    'portfolio_draw', 'tax',
+    'expenses_basic',
+    'draws_self_401k', 'draws_partner_401k', 'draws_roth_ira',
+    'draws_brokerage', 'draws_cash', 'draws_total',
+    'investment_return_self_401k', 'investment_return_partner_401k',
+    'investment_return_roth_ira', 'investment_return_brokerage',
+    'investment_return_cash', 'investment_return_total',
+    'account_balances_self_401k', 'account_balances_partner_401k',
+    'account_balances_roth_ira', 'account_balances_brokerage',
+    'account_balances_cash',
+)
 
-    account_balances: AccountBalances
-    
-    # Special events
-    downsize_proceeds: float
-    windfall_amount: float
-    expense_adjustment: float
-    
-    simulation_id: Optional[int] = None
 
+@dataclass
+class SimulationResults:
+    """Cash flows for all simulation paths, stored column-wise
 
-def monte_carlo_simulation(config: SimulationConfig) -> Tuple[int, int, List[Dict[str, Any]]]:
+    Each entry in fields is a (years, simulations) array - a year's values for all
+    paths are contiguous, and column sim holds one simulation path. timeline holds
+    the (years,) columns shared by all paths (year, ages and the income, expense,
+    contribution and special event schedules).
+    """
+    timeline: Dict[str, np.ndarray]
+    fields: Dict[str, np.ndarray]
+    final_balances: np.ndarray
+    depletion_years: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.final_balances)
+
+    def ranked_ids(self, ranks: List[int]) -> np.ndarray:
+        """Return the simulation ids at the given ranks, ordered from worst (0) to best outcome
+
+        - Earlier depletion year is worse
+        - For same depletion year, lower final balance is worse
+        Only the requested ranks are placed (argpartition), so no full sort is needed.
+        """
+        outcomes = np.rec.fromarrays([self.depletion_years, self.final_balances],
+                                     names='depletion_year,final_balance')
+        ranks = np.asarray(ranks)
+        return np.argpartition(outcomes, ranks, order=('depletion_year', 'final_balance'))[ranks]
+
+    def cash_flows(self, sim: int) -> Dict[str, np.ndarray]:
+        """Return the yearly cash flow columns of one simulation path (as float64 for display math)"""
+        columns = dict(self.timeline)
+        columns.update((name, values[:, sim].astype(np.float64)) for name, values in self.fields.items())
+        columns['simulation_id'] = np.full(len(columns['year']), sim, dtype=np.int32)
+        return columns
+
+
+def monte_carlo_simulation(config: SimulationConfig, seed: Optional[int] = None) -> Tuple[int, int, SimulationResults]:
     """Run Monte Carlo simulation for retirement planning
     
     Args:
         config: Simulation configuration parameters
+        seed: Optional random seed to make a run reproducible
         
     Returns:
-        Tuple containing success count, failure count, and sorted simulation results
+        Tuple containing success count, failure count, and the simulation results
     """
     current_year = datetime.now().year
     years_in_simulation = config.life_expectancy - config.current_age + 1
     
-    success_count = 0
-    failure_count = 0
-    all_simulation_results = []
-    
-    # Get the ranges of historical equity and bond returns
-    equity_return_min = min(historical_equity_returns.values()) / 100.0
-    equity_return_max = max(historical_equity_returns.values()) / 100.0
-    bond_return_min = min(historical_bond_returns.values()) / 100.0
-    bond_return_max = max(historical_bond_returns.values()) / 100.0
-    
-    for sim in range(config.simulations):
-        # Initialize accounts for this simulation
-        balances = AccountBalances(
-            self_401k=config.self_401k_balance,
-            partner_401k=config.partner_401k_balance,
-            roth_ira=config.roth_ira_balance,
-            brokerage=config.brokerage_balance,
-            cash=config.cash_savings_balance
-        )
-        
-        # Initialize simulation variables
-        savings = config.initial_savings
-        current_annual_expense = config.annual_expense
-        cash_flows = []
-        year_of_depletion = None
-        
-        # Preselect return values for all years in this simulation
-        # returns = preselect_investment_returns(
-        #     config.simulation_type,
-        #     years_in_simulation,
-        #     config.stock_return_mean, config.stock_return_std,
-        #     config.bond_return_mean, config.bond_return_std,
-        #     equity_return_min, equity_return_max, 
-        #     bond_return_min, bond_return_max, 
-        #     config.collar_min_return, config.collar_max_return
-        # )
-        
-        returns = preselect_investment_returns(
+    # Calendar year and ages are identical for every path - store them once (int16 is plenty)
+    year_offsets = np.arange(years_in_simulation)
+    timeline = {
+        'year': (current_year + year_offsets).astype(np.int16),
+        'self_age': (config.current_age + year_offsets).astype(np.int16),
+        'partner_age': (config.partner_current_age + year_offsets).astype(np.int16),
+    }
+
+    # Age-gated income and expense schedules depend only on the year, never on the
+    # path - compute them once per run as (years,) arrays and just index them below
+    income_schedule = calculate_yearly_income(
+        config, timeline['self_age'], timeline['partner_age'], year_offsets, current_year
+    )
+    expense_schedule = calculate_yearly_expenses(
+        config, timeline['self_age'], timeline['partner_age'], year_offsets, current_year, 0.0
+    )
+
+    # 401k contributions compound with COLA and pay growth but are also path independent
+    self_contribution_schedule = calculate_401k_contribution(
+        timeline['self_age'], config.retirement_age, 
+        config.self_401k_contribution, config.employer_self_401k_contribution,
+        current_year, year_offsets, config.cola_rate, 
+        config.maximize_self_contribution, config.self_yearly_increase
+    )
+    partner_contribution_schedule = calculate_401k_contribution(
+        timeline['partner_age'], config.partner_retirement_age,
+        config.partner_401k_contribution, config.employer_partner_401k_contribution,
+        current_year, year_offsets, config.cola_rate,
+        config.maximize_partner_contribution, config.partner_yearly_increase
+    )
+
+    # Effective tax rate by year, from the retirement status of both partners
+    tax_rate_schedule = calculate_tax_rate(
+        timeline['self_age'], timeline['partner_age'], config.retirement_age, config.partner_retirement_age,
+        config.tax_rate_both_working, config.tax_rate_one_retired, config.tax_rate_both_retired
+    )
+
+    # Deflators to today's money for each year's ending value - one (years,) array
+    # instead of a power per year per block
+    constant_currency_divisors = (1 + config.inflation_mean) ** (year_offsets + 1.0)
+
+    # Years in which at least one partner is retired (living expenses follow the smile)
+    retired_schedule = ((timeline['self_age'] >= config.retirement_age) |
+                        (timeline['partner_age'] >= config.partner_retirement_age))
+
+    # Sequence risk stress applies to the first seq_risk_years after the first retirement
+    years_since_first_retirement = year_offsets - min(config.retirement_age - config.current_age,
+                                                      config.partner_retirement_age - config.partner_current_age)
+    sequence_risk_schedule = (config.enable_sequence_risk &
+                              (years_since_first_retirement >= 0) &
+                              (years_since_first_retirement < config.seq_risk_years))
+
+    # Special events and living expense adjustments by year
+    calendar_years = timeline['year']
+    downsize_schedule = np.where(year_offsets == config.years_until_downsize, config.residual_amount, 0)
+    windfall_schedule = calculate_windfall(config.windfall_years, config.windfall_amounts, calendar_years)
+    expense_adjustment_schedule = get_expense_adjustment(
+        config.adjust_expense_years, config.adjust_expense_amounts, calendar_years)
+
+    # Record the path-independent columns once, alongside year and ages
+    schedules = {
+        **{f'income_{name}': values for name, values in vars(income_schedule).items()},
+        **{f'expenses_{name}': values for name, values in vars(expense_schedule).items() if name != 'basic'},
+        'self_contribution': self_contribution_schedule,
+        'partner_contribution': partner_contribution_schedule,
+        'downsize_proceeds': downsize_schedule,
+        'windfall_amount': windfall_schedule,
+        'expense_adjustment': expense_adjustment_schedule,
+    }
+    timeline.update((name, np.asarray(values, dtype=np.float64)) for name, values in schedules.items())
+
+    # One contiguous (columns, years, simulations) block, allocated once and
+    # exposed as a named (years, simulations) view per cash flow column - the
+    # values recorded for a year across the paths of a block are contiguous.
+    # Stored as float32 (the math itself stays float64) to halve memory and bandwidth.
+    cash_flow_data = np.empty((len(CASH_FLOW_FIELDS), years_in_simulation, config.simulations), dtype=np.float32)
+    fields = dict(zip(CASH_FLOW_FIELDS, cash_flow_data))
+
+    # Per-simulation outcomes, preallocated so counting and sorting are array operations
+    final_balances = np.empty(config.simulations, dtype=np.float64)
+    depletion_years = np.empty(config.simulations, dtype=np.int64)
+    
+    # Process simulation paths in blocks sized from the plan length, so each of the block's
+    # (paths, years) input arrays - stock, bond, inflation and expense growth - stays near L2.
+    # Only these per-block draws are bounded: cash_flow_data above still grows with simulations.
+    # Paths are independent, so each block gets its own random stream spawned from the
+    # run seed - blocks can run concurrently and a seeded run stays reproducible
+    chunk_size_limit = max(MIN_SIMULATION_CHUNK_SIZE,
+                           SIMULATION_BLOCK_BYTES // (np.dtype(np.float32).itemsize * max(years_in_simulation, 1)))
+    block_starts = range(0, config.simulations, chunk_size_limit)
+    block_seeds = np.random.SeedSequence(seed).spawn(len(block_starts))
+
+    def simulate_block(chunk_start, block_seed):
+        """Simulate one block of paths, writing into its rows of the shared result arrays"""
+        rng = np.random.default_rng(block_seed)
+        chunk_size = min(chunk_size_limit, config.simulations - chunk_start)
+
+        # Preselect return values for all simulations and years in this block (float32)
+        stock_returns, bond_returns = preselect_investment_returns(
             config.simulation_type,
-            years_in_simulation,
+            chunk_size, years_in_simulation,
             config.stock_return_mean, config.stock_return_std,
             config.bond_return_mean,  config.bond_return_std,
-            equity_return_min, equity_return_max,
-            bond_return_min,   bond_return_max
+            EQUITY_RETURN_MIN, EQUITY_RETURN_MAX,
+            BOND_RETURN_MIN,   BOND_RETURN_MAX,
+            rng
         )
 
-        for year in range(years_in_simulation):
+        # Draw the yearly inflation rates for the whole block up front (first year is not inflated),
+        # as one float32 standard-normal block scaled in place like the return draws
+        inflation_rates = rng.standard_normal((chunk_size, years_in_simulation), dtype=np.float32)
+        inflation_rates *= np.float32(config.inflation_std)
+        inflation_rates += np.float32(config.inflation_mean)
 
-            # set the initial value to 0 if balance becomes negative
-            if savings < 0:
-                savings = -1
+        # Living expense growth for every path and year of the block, computed in one pass
+        expense_growth = expense_growth_factors(inflation_rates, config.annual_expense_decrease,
+                                                retired_schedule)
 
-            # Calculate current ages
-            self_age = config.current_age + year
-            partner_age = config.partner_current_age + year
+        # Rows of the output arrays filled by this block
+        rows = slice(chunk_start, chunk_start + chunk_size)
 
-            # Set flag for sequence risk if enabled
-            apply_sequence_risk = False
-            if config.enable_sequence_risk:
-                # Check if either person is retired
-                self_retired = self_age >= config.retirement_age
-                partner_retired = partner_age >= config.partner_retirement_age
+        # Initialize accounts for every simulation path in this block
+        balances = AccountBalances(
+            self_401k=np.full(chunk_size, config.self_401k_balance, dtype=np.float64),
+            partner_401k=np.full(chunk_size, config.partner_401k_balance, dtype=np.float64),
+            roth_ira=np.full(chunk_size, config.roth_ira_balance, dtype=np.float64),
+            brokerage=np.full(chunk_size, config.brokerage_balance, dtype=np.float64),
+            cash=np.full(chunk_size, config.cash_savings_balance, dtype=np.float64)
+        )
+    
+        # Initialize simulation variables (one entry per path)
+        savings = np.full(chunk_size, config.initial_savings, dtype=np.float64)
+        current_annual_expense = np.full(chunk_size, config.annual_expense, dtype=np.float64)
+    
+        # Return series for the paths of this block
+        returns = (stock_returns, bond_returns)
+
+        # Step all paths of the block forward together, one year at a time -
+        # ages, income, contributions and special events are the same for every path
+        for year in range(years_in_simulation):
+
+            # set the initial value to -1 if balance becomes negative
+            savings = np.where(savings < 0, -1.0, savings)
+
+            # Flag for sequence risk (precomputed schedule)
+            apply_sequence_risk = sequence_risk_schedule[year]
+        
+            # Income streams for this year (precomputed schedule)
+            income = schedule_for_year(income_schedule, year)
+        
+            # 401k contributions for this year (precomputed schedule)
+            self_contribution = self_contribution_schedule[year]
+            partner_contribution = partner_contribution_schedule[year]
                 
-                # Calculate years since first retirement occurred
-                if self_retired or partner_retired:
-                    # Calculate the calendar year when each person retires
-                    self_retirement_year = current_year + (config.retirement_age - config.current_age)
-                    partner_retirement_year = current_year + (config.partner_retirement_age - config.partner_current_age)
-                    
-                    # Find which retirement happens first
-                    first_retirement_year = min(self_retirement_year, partner_retirement_year)
-                    
-                    # Calculate how many years have passed since the first retirement
-                    years_since_first_retirement = (current_year + year) - first_retirement_year
-                    
-                    # Apply stress if we're within the sequence risk period after first retirement
-                    if years_since_first_retirement >= 0 and years_since_first_retirement < config.seq_risk_years:
-                        apply_sequence_risk = True
-            
-            # Calculate income streams
-            income = calculate_yearly_income(
-                config, self_age, partner_age, year, current_year
-            )
-            
-            # Calculate 401k contributions
-            self_contribution = calculate_401k_contribution(
-                self_age, config.retirement_age, 
-                config.self_401k_contribution, config.employer_self_401k_contribution,
-                current_year, year, config.cola_rate, 
-                config.maximize_self_contribution, config.self_yearly_increase
-            )
-            
-            partner_contribution = calculate_401k_contribution(
-                partner_age, config.partner_retirement_age,
-                config.partner_401k_contribution, config.employer_partner_401k_contribution,
-                current_year, year, config.cola_rate,
-                config.maximize_partner_contribution, config.partner_yearly_increase
-            )
-                    
-            # Adjust for inflation and update annual expense
-            current_annual_expense = adjust_expenses(
-                current_annual_expense, config.inflation_mean, config.inflation_std,
-                config.annual_expense_decrease, year, self_age, config.retirement_age,
-                partner_age, config.partner_retirement_age
-            )
+            # Adjust for inflation and update annual expense (precomputed growth factors)
+            current_annual_expense = current_annual_expense * expense_growth[:, year]
 
 
             # Calculate living expense adjustment for current year 
-            expense_adjustment = get_expense_adjustment(
-                config.adjust_expense_years, config.adjust_expense_amounts, current_year + year)
-            
+            expense_adjustment = timeline['expense_adjustment'][year]
+        
 
             # Apply the adjustment to reduce living expenses
             current_annual_expense = current_annual_expense + expense_adjustment
 
-            #Calculate expenses using the adjusted amount
-            expenses = calculate_yearly_expenses(
-                config, self_age, partner_age, year, current_year,
-                current_annual_expense
-            )
+            # Expenses for this year (precomputed schedule) using the adjusted living expense
+            expenses = schedule_for_year(expense_schedule, year, basic=current_annual_expense)
 
             # Calculate tax and portfolio draw
             portfolio_draw, total_tax = calculate_portfolio_draw(
-                expenses.total, income.total, 
-                self_age, partner_age, config.retirement_age, config.partner_retirement_age,
-                config.tax_rate_both_working, config.tax_rate_one_retired, config.tax_rate_both_retired
+                expenses.total, income.total, tax_rate_schedule[year]
             )
-            
+        
             # Calculate the draw-down amount proportioned among different accounts
             draws = calculate_draws(portfolio_draw, balances)
-            
+        
             # Calculate investment returns with stress test applied
             if apply_sequence_risk:
                 # Override returns with stress test values
@@ -386,92 +464,81 @@ def monte_carlo_simulation(config: SimulationConfig) -> Tuple[int, int, List[Dic
                 investment_return = calculate_investment_return(
                     config, balances, savings, returns, year
                 )
-
-            # Calculate investment returns using the selected simulation method
-            # investment_return = calculate_investment_return(
-            #     config, balances, savings, returns, year
-            # )
-            
+        
             # Special events
-            downsize_proceeds = config.residual_amount if year == config.years_until_downsize else 0
-            
-            windfall_amount = calculate_windfall(config.windfall_years, config.windfall_amounts, 
-                                                current_year + year)
-            
+            downsize_proceeds = timeline['downsize_proceeds'][year]
+            windfall_amount = timeline['windfall_amount'][year]
+        
             # Update account balances
             update_account_balances(
                 balances, investment_return, draws, 
                 self_contribution, partner_contribution,
                 income.total, expenses.total, total_tax
             )
-            
+        
             # Calculate ending portfolio values
             ending_portfolio_value = savings + investment_return.total + income.total - expenses.total - total_tax
-            end_value_at_current_currency = ending_portfolio_value / ((1 + config.inflation_mean) ** (year + 1))
-            
-            # Create cash flow entry for this year
-            cash_flow_entry = YearlyCashFlow(
-                year=current_year + year,
-                self_age=self_age,
-                partner_age=partner_age,
-                income=income,
-                expenses=expenses,
-                tax=total_tax,
-                beginning_balance=savings,
-                ending_balance=ending_portfolio_value,
-                end_value_constant_currency=end_value_at_current_currency,
-                portfolio_draw=portfolio_draw,
-                draws=draws,
-                investment_return=investment_return,
-                #contributions=(copy.deepcopy(self_contribution), copy.deepcopy(partner_contribution)), # fix to address variable reference vs. new isntance
-                contributions=[self_contribution, partner_contribution],  # list
-                account_balances=copy.deepcopy(balances),  # fix to address variable reference vs. new isntance
-                downsize_proceeds=downsize_proceeds,
-                windfall_amount=windfall_amount,
-                expense_adjustment=expense_adjustment,
-                simulation_id=sim
-            )
-            
-            # Add to cash flows for this simulation
-            cash_flows.append(cash_flow_entry)
-            
-            # Set next period's opening balance
-            savings = ending_portfolio_value + downsize_proceeds + windfall_amount
-            
-            # Check for depletion - only set once per simulation
-            if savings < 0 and year_of_depletion is None:
-                year_of_depletion = current_year + year
-        
-        # If portfolio never depleted, set year_of_depletion to final year
-        if year_of_depletion is None:
-            year_of_depletion = current_year + years_in_simulation - 1
-        
-        # Create a simulation result with all cash flows and the depletion year
-        simulation_result = {
-            "simulation_id": sim,
-            "year_of_depletion": year_of_depletion,
-            "final_balance": savings,
-            "success": savings >= 0,
-            "cash_flows": cash_flows
-        }
+            end_value_at_current_currency = ending_portfolio_value / constant_currency_divisors[year]
         
-        all_simulation_results.append(simulation_result)
+            # Record this year's cash flow for all paths of the block
+            column = (year, rows)
+            fields['beginning_balance'][column] = savings
+            fields['ending_balance'][column] = ending_portfolio_value
+            fields['end_value_constant_currency'][column] = end_value_at_current_currency
+            fields['portfolio_draw'][column] = portfolio_draw
+            fields['tax'][column] = total_tax
+
+
+            fields['expenses_basic'][column] = expenses.basic
+
+            fields['draws_self_401k'][column] = draws.self_401k
+            fields['draws_partner_401k'][column] = draws.partner_401k
+            fields['draws_roth_ira'][column] = draws.roth_ira
+            fields['draws_brokerage'][column] = draws.brokerage
+            fields['draws_cash'][column] = draws.cash
+            fields['draws_total'][column] = draws.total
+
+            fields['investment_return_self_401k'][column] = investment_return.self_401k
+            fields['investment_return_partner_401k'][column] = investment_return.partner_401k
+            fields['investment_return_roth_ira'][column] = investment_return.roth_ira
+            fields['investment_return_brokerage'][column] = investment_return.brokerage
+            fields['investment_return_cash'][column] = investment_return.cash
+            fields['investment_return_total'][column] = investment_return.total
+
+
+            fields['account_balances_self_401k'][column] = balances.self_401k
+            fields['account_balances_partner_401k'][column] = balances.partner_401k
+            fields['account_balances_roth_ira'][column] = balances.roth_ira
+            fields['account_balances_brokerage'][column] = balances.brokerage
+            fields['account_balances_cash'][column] = balances.cash
+
         
-        # Update success/failure counts
-        if savings >= 0:
-            success_count += 1
-        else:
-            failure_count += 1
-    
-    # Sort simulations from worst to best:
-    # - Earlier depletion year is worse
-    # - For same depletion year, lower final balance is worse
-    sorted_simulation_results = sorted(
-        all_simulation_results,
-        key=lambda sim: (sim["year_of_depletion"], sim["final_balance"])
-    )
+            # Set next period's opening balance
+            savings = ending_portfolio_value + downsize_proceeds + windfall_amount
+
+        final_balances[rows] = savings
+
+        # Depletion year: first year whose next opening balance is negative, in one pass
+        # over the recorded columns (paths that never deplete keep the final year).
+        # Next year's beginning balance is clamped to -1 once negative, so its sign
+        # survives the float32 storage exactly; the last year uses the final balance.
+        below_zero = np.concatenate((fields['beginning_balance'][1:, rows] < 0, (savings < 0)[None]))
+        depletion_years[rows] = current_year + np.where(
+            below_zero.any(axis=0), below_zero.argmax(axis=0), years_in_simulation - 1
+        )
+
+    # Blocks write disjoint rows of the shared arrays and numpy releases the GIL inside
+    # its array operations, so large runs spread their blocks over the available cores
+    # (threads rather than processes - nothing has to be pickled or re-imported)
+    max_workers = max(1, min(len(block_starts), os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(simulate_block, block_starts, block_seeds))
+
+    # Update success/failure counts
+    success_count = int(np.count_nonzero(final_balances >= 0))
+    failure_count = config.simulations - success_count
     
-    return success_count, failure_count, sorted_simulation_results
+    return success_count, failure_count, SimulationResults(timeline, fields, final_balances, depletion_years)
 
 
 def setup_markov_chain():
@@ -611,75 +678,79 @@ def setup_markov_chain():
 #     }
 
 
-def preselect_investment_returns(simulation_type, years, 
+def preselect_investment_returns(simulation_type, simulations, years,
                                 stock_mean, stock_std, bond_mean, bond_std,
-                                equity_min, equity_max, bond_min, bond_max):
-    """Preselect investment returns for the entire simulation (base models only)"""
-    # Empirical
-    replace_option = True if simulation_type == "Empirical Distribution" else False
-    selected_years = np.random.choice(list(historical_equity_returns.keys()), size=years, replace=replace_option)
-    empirical_equity_returns = [historical_equity_returns[int(year)] / 100 for year in selected_years]
-    empirical_bond_returns   = [historical_bond_returns[int(year)] / 100 for year in selected_years]
-    np.random.shuffle(empirical_equity_returns)
-    np.random.shuffle(empirical_bond_returns)
-    
-    # Normal (clipped to historical bounds)
-    normal_stock_returns = np.clip(np.random.normal(stock_mean, stock_std, years), equity_min, equity_max)
-    normal_bond_returns  = np.clip(np.random.normal(bond_mean,  bond_std,  years), bond_min,  bond_max)
-
-    # Student-t
-    df = 5
-    t_stock_returns = t.rvs(df, loc=stock_mean, scale=stock_std, size=years)
-    t_bond_returns  = t.rvs(df, loc=bond_mean,  scale=bond_std,  size=years)
-
-    # Lognormal (kept for completeness; not used in selection)
-    lognormal_stock_returns = np.random.lognormal(mean=np.log(stock_mean), sigma=stock_std, size=years)
-    lognormal_bond_returns  = np.random.lognormal(mean=np.log(bond_mean),  sigma=bond_std,  size=years)
-
-    # Markov
-    if simulation_type == "Markov Chain":
-        transition_matrix, state_returns, bond_adjustment = setup_markov_chain()
-        initial_state = np.random.choice([0, 1, 2], p=[0.2, 0.6, 0.2])
-        markov_stock_returns = np.zeros(years)
-        markov_bond_returns  = np.zeros(years)
-        current_state = initial_state
-        for i in range(years):
-            state_mean = state_returns[current_state]["mean"]
-            state_std  = state_returns[current_state]["std"]
-            markov_stock_returns[i] = np.random.normal(state_mean, state_std)
-            bond_adj_mean = bond_adjustment[current_state]["mean"]
-            bond_adj_std  = bond_adjustment[current_state]["std"]
-            adjusted_bond_mean = bond_mean + bond_adj_mean
-            adjusted_bond_std  = bond_std * bond_adj_std
-            markov_bond_returns[i] = np.random.normal(adjusted_bond_mean, adjusted_bond_std)
-            current_state = np.random.choice([0,1,2], p=transition_matrix[current_state])
-        markov_stock_returns = np.clip(markov_stock_returns, equity_min, equity_max)
-        markov_bond_returns  = np.clip(markov_bond_returns,  bond_min,  bond_max)
-    else:
-        markov_stock_returns = np.zeros(years)
-        markov_bond_returns  = np.zeros(years)
-
-    return {
-        "empirical": (empirical_equity_returns, empirical_bond_returns),
-        "normal":    (normal_stock_returns,    normal_bond_returns),
-        "t":         (t_stock_returns,         t_bond_returns),
-        "lognormal": (lognormal_stock_returns, lognormal_bond_returns),
-        "markov":    (markov_stock_returns,    markov_bond_returns)
-    }
+                                equity_min, equity_max, bond_min, bond_max, rng):
+    """Preselect investment returns for every simulation path (base models only)
+
+    Returns stock and bond return matrices of shape (simulations, years) in float32 -
+    only the model selected by simulation_type is drawn.
+    """
+    shape = (simulations, years)
+
+    # Cast the user scalars once so the arithmetic stays in float32
+    stock_mean, stock_std = np.float32(stock_mean), np.float32(stock_std)
+    bond_mean, bond_std = np.float32(bond_mean), np.float32(bond_std)
 
-def pick_base_returns(simulation_type: str, returns: Dict[str, tuple], y: int) -> Tuple[float, float]:
-    """Select base model stock/bond returns for year y."""
     if simulation_type == "Normal Distribution":
-        return returns["normal"][0][y], returns["normal"][1][y]
+        # Normal (clipped to historical bounds)
+        stock_returns = rng.standard_normal(shape, dtype=np.float32) * stock_std + stock_mean
+        bond_returns  = rng.standard_normal(shape, dtype=np.float32) * bond_std  + bond_mean
+        np.clip(stock_returns, equity_min, equity_max, out=stock_returns)
+        np.clip(bond_returns,  bond_min,   bond_max,   out=bond_returns)
+
     elif simulation_type == "Students-T Distribution":
-        return returns["t"][0][y], returns["t"][1][y]
+        # Location/scale Student-t straight from the generator (no scipy per-call dispatch)
+        df = 5
+        stock_returns = rng.standard_t(df, size=shape).astype(np.float32) * stock_std + stock_mean
+        bond_returns  = rng.standard_t(df, size=shape).astype(np.float32) * bond_std  + bond_mean
+
     elif simulation_type == "Empirical Distribution":
-        return returns["empirical"][0][y], returns["empirical"][1][y]
+        # Sample historical years with replacement; bonds use an independent shuffle of the same years
+        selected = rng.integers(0, len(HISTORICAL_EQUITY_RETURNS), size=shape)
+        stock_returns = HISTORICAL_EQUITY_RETURNS[selected]
+        bond_returns  = HISTORICAL_BOND_RETURNS[rng.permuted(selected, axis=1)]
+
     elif simulation_type == "Markov Chain":
-        return returns["markov"][0][y], returns["markov"][1][y]
+        transition_matrix, state_returns, bond_adjustment = setup_markov_chain()
+
+        # Per-state parameters as arrays, indexed by each path's current state
+        states = sorted(state_returns)
+        state_means = np.array([state_returns[state]["mean"] for state in states])
+        state_stds  = np.array([state_returns[state]["std"] for state in states])
+        adjusted_bond_means = bond_mean + np.array([bond_adjustment[state]["mean"] for state in states])
+        adjusted_bond_stds  = bond_std * np.array([bond_adjustment[state]["std"] for state in states])
+
+        # Cumulative transition probabilities (last column dropped) for inverse-CDF state sampling
+        transition_thresholds = np.cumsum(transition_matrix, axis=1)[:, :-1]
+
+        # Draw all random variates for the block in one batch up front
+        current_state = rng.choice(len(states), size=simulations, p=[0.2, 0.6, 0.2])
+        transition_draws = rng.random(shape)
+        stock_noise = rng.standard_normal(shape, dtype=np.float32)
+        bond_noise  = rng.standard_normal(shape, dtype=np.float32)
+
+        # Step every path's regime forward together - only the state sequence is sequential
+        regimes = np.empty(shape, dtype=np.intp)
+        for i in range(years):
+            regimes[:, i] = current_state
+            current_state = (transition_draws[:, i, None] >= transition_thresholds[current_state]).sum(axis=1)
+
+        # Scale the noise by each path's regime parameters
+        stock_returns = (state_means[regimes] + state_stds[regimes] * stock_noise).astype(np.float32)
+        bond_returns  = (adjusted_bond_means[regimes] + adjusted_bond_stds[regimes] * bond_noise).astype(np.float32)
+        np.clip(stock_returns, equity_min, equity_max, out=stock_returns)
+        np.clip(bond_returns,  bond_min,   bond_max,   out=bond_returns)
+
     else:
         raise ValueError(f"Unknown simulation type: {simulation_type}")
 
+    return stock_returns, bond_returns
+
+def pick_base_returns(returns: Tuple[np.ndarray, np.ndarray], y: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Select base model stock/bond returns for year y of every simulation path in the block."""
+    return returns[0][:, y].astype(np.float64), returns[1][:, y].astype(np.float64)
+
 
 def apply_collar_overlay(stock_return_rate: float, config: SimulationConfig, current_calendar_year: int) -> float:
     """
@@ -700,8 +771,14 @@ def apply_collar_overlay(stock_return_rate: float, config: SimulationConfig, cur
     return p * clipped + (1.0 - p) * stock_return_rate
 
 
+def schedule_for_year(schedule, year, **overrides):
+    """Pick a single year out of a precomputed (years,) income/expense schedule"""
+    values = {name: column[year] for name, column in vars(schedule).items() if name not in overrides}
+    return type(schedule)(**values, **overrides)
+
+
 def calculate_yearly_income(config, self_age, partner_age, year, current_year):
-    """Calculate all income sources for a given year"""
+    """Calculate all income sources for a given year (or a whole array of years at once)"""
     
     # Calculate earnings (employment)
     self_earnings = calculate_earnings(
@@ -737,11 +814,13 @@ def calculate_yearly_income(config, self_age, partner_age, year, current_year):
     )
     
     # Calculate rental income
-    if config.rental_start <= current_year + year <= config.rental_end:
-        rental_income = config.rental_amt * ((1 + config.rental_yearly_increase) ** 
-                                           (current_year + year - config.rental_start))
-    else:
-        rental_income = 0
+    calendar_year = current_year + year
+    rental_income = np.where(
+        (config.rental_start <= calendar_year) & (calendar_year <= config.rental_end),
+        config.rental_amt * ((1 + config.rental_yearly_increase) ** 
+                             np.maximum(calendar_year - config.rental_start, 0)),
+        0
+    )
     
     return YearlyIncome(
         self_earnings=self_earnings,
@@ -755,7 +834,7 @@ def calculate_yearly_income(config, self_age, partner_age, year, current_year):
 
 
 def calculate_yearly_expenses(config, self_age, partner_age, year, current_year, current_expense):
-    """Calculate all expense categories for a given year"""
+    """Calculate all expense categories for a given year (or a whole array of years at once)"""
     
     # Calculate mortgage payment
     mortgage = calculate_mortgage(config.mortgage_payment, year, config.mortgage_years_remaining)
@@ -842,7 +921,7 @@ def calculate_investment_return(config, balances, savings, returns, year):
     current_calendar_year = datetime.now().year + year
 
     # 1) Base model
-    stock_return_rate, bond_return_rate = pick_base_returns(config.simulation_type, returns, year)
+    stock_return_rate, bond_return_rate = pick_base_returns(returns, year)
 
     # 2) Collar overlay (if enabled & within window)
     stock_return_rate = apply_collar_overlay(stock_return_rate, config, current_calendar_year)
@@ -939,7 +1018,7 @@ def calculate_investment_return_with_override(config, balances, savings, returns
     current_calendar_year = datetime.now().year + year
 
     # 1) Bonds from the base model
-    _, bond_return_rate = pick_base_returns(config.simulation_type, returns, year)
+    _, bond_return_rate = pick_base_returns(returns, year)
 
     # 2) Stock from SoR override
     stock_return_rate = override_return
@@ -988,10 +1067,7 @@ def update_account_balances(balances, returns, draws, self_contribution, partner
     net_surplus = income - expenses - tax - self_contribution - partner_contribution
     
     # Add surplus to brokerage account if positive
-    if net_surplus > 0:
-        balances.brokerage += returns.brokerage - draws.brokerage + net_surplus
-    else:
-        balances.brokerage += returns.brokerage - draws.brokerage
+    balances.brokerage += returns.brokerage - draws.brokerage + np.maximum(net_surplus, 0)
 
 def calculate_draws(portfolio_draw, balances):
     """Calculate withdrawal amounts from each account type"""
@@ -999,20 +1075,20 @@ def calculate_draws(portfolio_draw, balances):
     remaining_draw = portfolio_draw
     
     # Initialize draws
-    brokerage_draw = min(remaining_draw, balances.brokerage)
-    remaining_draw -= brokerage_draw
+    brokerage_draw = np.minimum(remaining_draw, balances.brokerage)
+    remaining_draw = remaining_draw - brokerage_draw
     
-    self_401k_draw = min(remaining_draw, balances.self_401k)
-    remaining_draw -= self_401k_draw
+    self_401k_draw = np.minimum(remaining_draw, balances.self_401k)
+    remaining_draw = remaining_draw - self_401k_draw
     
-    partner_401k_draw = min(remaining_draw, balances.partner_401k)
-    remaining_draw -= partner_401k_draw
+    partner_401k_draw = np.minimum(remaining_draw, balances.partner_401k)
+    remaining_draw = remaining_draw - partner_401k_draw
     
-    cash_draw = min(remaining_draw, balances.cash)
-    remaining_draw -= cash_draw
+    cash_draw = np.minimum(remaining_draw, balances.cash)
+    remaining_draw = remaining_draw - cash_draw
     
-    roth_ira_draw = min(remaining_draw, balances.roth_ira)
-    remaining_draw -= roth_ira_draw
+    roth_ira_draw = np.minimum(remaining_draw, balances.roth_ira)
+    remaining_draw = remaining_draw - roth_ira_draw
     
     return YearlyDraws(
         self_401k=self_401k_draw,
@@ -1026,107 +1102,88 @@ def calculate_draws(portfolio_draw, balances):
 
 def calculate_earnings(starting_earnings, yearly_increment, year, retirement_age, current_age):
     """Calculate earnings based on age and retirement status"""
-    if current_age < retirement_age:
-        return starting_earnings * (1 + yearly_increment) ** year
-    return 0
+    return np.where(current_age < retirement_age, starting_earnings * (1 + yearly_increment) ** year, 0)
 
 
 def calculate_pension(annual_pension, pension_yearly_increase, year, retirement_age, current_age):
     """Calculate pension income based on retirement status"""
-    if current_age >= retirement_age:
-        return annual_pension * (1 + pension_yearly_increase) ** (current_age - retirement_age)
-    return 0
+    years_retired = np.maximum(current_age - retirement_age, 0)
+    return np.where(current_age >= retirement_age,
+                    annual_pension * (1 + pension_yearly_increase) ** years_retired, 0)
 
 
 def calculate_social_security(annual_ss, cola_rate, withdrawal_start_age, current_age):
     """Calculate social security benefits based on eligibility age"""
-    if current_age >= withdrawal_start_age:
-        return annual_ss * (1 + cola_rate) ** (current_age - withdrawal_start_age)
-    return 0
+    years_claimed = np.maximum(current_age - withdrawal_start_age, 0)
+    return np.where(current_age >= withdrawal_start_age,
+                    annual_ss * (1 + cola_rate) ** years_claimed, 0)
 
 
 def calculate_mortgage(mortgage_payment, year, mortgage_years_remaining):
     """Calculate mortgage payment based on remaining years"""
-    return mortgage_payment if year < mortgage_years_remaining else 0
+    return np.where(year < mortgage_years_remaining, mortgage_payment, 0)
 
 
 def calculate_healthcare_costs(current_age, self_healthcare_cost, self_healthcare_start_age, 
                                partner_current_age, partner_healthcare_cost, partner_healthcare_start_age,
                                inflation_mean):
     """Calculate healthcare costs for both self and partner"""
-    self_cost = 0
-    partner_cost = 0
-    
-    # Self healthcare costs
-    if current_age >= self_healthcare_start_age:
-        if current_age < 65:  # Medicare age
-            self_cost = self_healthcare_cost * (1 + inflation_mean)**(current_age - self_healthcare_start_age)
-        else:
-            self_cost = 0
-    
-    # Partner healthcare costs
-    if partner_current_age >= partner_healthcare_start_age:
-        if partner_current_age < 65:  # Medicare age
-            partner_cost = partner_healthcare_cost * (1 + inflation_mean)**(partner_current_age - partner_healthcare_start_age)
-        else:
-            partner_cost = 0
+    # Self healthcare costs - from the start age until Medicare age (65)
+    self_cost = np.where(
+        (current_age >= self_healthcare_start_age) & (current_age < 65),
+        self_healthcare_cost * (1 + inflation_mean)**np.maximum(current_age - self_healthcare_start_age, 0),
+        0
+    )
+    
+    # Partner healthcare costs - from the start age until Medicare age (65)
+    partner_cost = np.where(
+        (partner_current_age >= partner_healthcare_start_age) & (partner_current_age < 65),
+        partner_healthcare_cost * (1 + inflation_mean)**np.maximum(partner_current_age - partner_healthcare_start_age, 0),
+        0
+    )
     
     total_cost = self_cost + partner_cost
     return total_cost, self_cost, partner_cost
 
 
-def adjust_expenses(current_expense, inflation_mean, inflation_std, annual_expense_decrease, 
-                    year, current_age, retirement_age, partner_current_age, partner_retirement_age):
-    """Adjust expenses for inflation and retirement status"""
-    if year > 0:  # Skip the first year
-        inflation_rate = np.random.normal(inflation_mean, inflation_std)
-        
-        if current_age >= retirement_age or partner_current_age >= partner_retirement_age:
-            # If one partner retired - apply expense reduction (Retirement Smile)
-            return current_expense * (1 + inflation_rate - annual_expense_decrease)
-        else:
-            # At least one still working - only apply inflation
-            return current_expense * (1 + inflation_rate)
-    
-    return current_expense
-
+def expense_growth_factors(inflation_rates, annual_expense_decrease, retired):
+    """Yearly living expense growth factors for a block of paths, from the (pre-drawn) inflation rates
 
-def calculate_portfolio_draw(total_expense, gross_income, 
-                             self_age, partner_age, retirement_age, partner_retirement_age,
-                             tax_rate_both_working, tax_rate_one_retired, tax_rate_both_retired):
-    """Calculate required portfolio withdrawal and total tax"""
+    Inflation alone while both are working; once either partner is retired (the (years,)
+    retired mask) the expense reduction (Retirement Smile) is subtracted. The first year
+    is not adjusted.
+    """
+    growth = 1 + inflation_rates
+    growth[:, retired] -= annual_expense_decrease
+    growth[:, 0] = 1
+    return growth
 
-    # Determine effective tax rate based on the retirement status 
 
-    # Determine tax rate based on retirement status
+def calculate_tax_rate(self_age, partner_age, retirement_age, partner_retirement_age,
+                       tax_rate_both_working, tax_rate_one_retired, tax_rate_both_retired):
+    """Effective tax rate by retirement status (scalar ages or per-year arrays)"""
     # Check if each partner is retired
-    self_is_retired = self_age >= retirement_age
-    partner_is_retired = partner_age >= partner_retirement_age
-    
-    # Determine tax rate based on retirement status
-    if not self_is_retired and not partner_is_retired:
-        # Both partners still working
-        tax_rate = tax_rate_both_working
-    elif self_is_retired and partner_is_retired:
-        # Both partners retired
-        tax_rate = tax_rate_both_retired
-    else:
-        # One partner is retired, one is still working
-        tax_rate = tax_rate_one_retired
+    self_is_retired = np.asarray(self_age >= retirement_age, dtype=np.intp)
+    partner_is_retired = np.asarray(partner_age >= partner_retirement_age, dtype=np.intp)
+
+    # The number of retired partners (0, 1 or 2) indexes the rate table directly
+    tax_rates = np.array([tax_rate_both_working, tax_rate_one_retired, tax_rate_both_retired])
+    return tax_rates[self_is_retired + partner_is_retired]
+
+
+def calculate_portfolio_draw(total_expense, gross_income, tax_rate):
+    """Calculate required portfolio withdrawal and total tax"""
 
     # Calculate estimated tax using the determined tax rate
     estimated_tax = gross_income * tax_rate
 
-    if total_expense <= (gross_income - estimated_tax):
-        # No withdrawal needed
-        return 0, estimated_tax
-    else:
-        # Need to withdraw from portfolio
-        portfolio_draw = total_expense - (gross_income - estimated_tax)
-        portfolio_tax = portfolio_draw * tax_rate
-        total_tax = portfolio_tax + estimated_tax
-        
-        return portfolio_draw + portfolio_tax, total_tax
+    # Withdraw from the portfolio only where expenses exceed after-tax income
+    # (works element-wise when total_expense holds one value per simulation path)
+    portfolio_draw = np.maximum(total_expense - (gross_income - estimated_tax), 0)
+    portfolio_tax = portfolio_draw * tax_rate
+    total_tax = portfolio_tax + estimated_tax
+    
+    return portfolio_draw + portfolio_tax, total_tax
 
 
 def get_latest_limit(contribution_dict, current_year):
@@ -1141,11 +1198,7 @@ def get_latest_limit(contribution_dict, current_year):
 
 def calculate_401k_contribution(current_age, retirement_age, yearly_contribution, employer_contribution,
                                current_year, year, cola_rate, maximize_contribution, pay_growth_rate):
-    """Calculate 401k contribution including employer match and catch-up"""
-    # Return 0 if already retired
-    if current_age >= retirement_age:
-        return 0
-        
+    """Calculate 401k contribution including employer match and catch-up (scalar or per-year arrays)"""
     # Get base contribution limits and adjust for COLA
     base_limit = get_latest_limit(contribution_limits["401k"], current_year)
     adjusted_limit = base_limit * ((1 + cola_rate) ** year)
@@ -1159,7 +1212,7 @@ def calculate_401k_contribution(current_age, retirement_age, yearly_contribution
     scaled_employer_contribution = employer_contribution * ((1 + pay_growth_rate) ** year)
     
     # Determine catch-up amount
-    catch_up_amount = adjusted_catch_up_limit if current_age >= catchup_age_401k else 0
+    catch_up_amount = np.where(current_age >= catchup_age_401k, adjusted_catch_up_limit, 0)
     
     # Calculate total contribution
     if maximize_contribution:
@@ -1167,94 +1220,34 @@ def calculate_401k_contribution(current_age, retirement_age, yearly_contribution
         employee_contribution = adjusted_limit + catch_up_amount
     else:
         # Specified contribution rate, capped at maximum
-        employee_contribution = min(scaled_yearly_contribution, adjusted_limit + catch_up_amount)
+        employee_contribution = np.minimum(scaled_yearly_contribution, adjusted_limit + catch_up_amount)
     
-    total_contribution = employee_contribution + scaled_employer_contribution
+    # No contributions once retired
+    total_contribution = np.where(current_age >= retirement_age, 0,
+                                  employee_contribution + scaled_employer_contribution)
     return total_contribution
 
 
+def sum_events_by_year(event_years, event_amounts, current_year):
+    """Total of the (year, amount) events falling in the current year (or an array of years)
+
+    All events are matched at once - a (years, events) mask times the amounts vector.
+    """
+    matches = np.asarray(current_year)[..., None] == np.asarray(event_years)
+    return matches @ np.asarray(event_amounts, dtype=np.float64)
+
+
 def calculate_windfall(windfall_years, windfall_amounts, current_year):
-    """Calculate windfalls for the current year"""
-    windfall_amount = 0
-    
-    for i in range(len(windfall_years)):
-        if windfall_years[i] == current_year:
-            windfall_amount += windfall_amounts[i]
-            
-    return windfall_amount
+    """Calculate windfalls for the current year (or an array of years)"""
+    return sum_events_by_year(windfall_years, windfall_amounts, current_year)
 
 
 def get_expense_adjustment(adjust_expense_years, adjust_expense_amounts, current_year):
-    """Get expense adjustment for the current year"""
-    expense_adjustment = 0
-    
-    for i in range(len(adjust_expense_years)):
-        if adjust_expense_years[i] == current_year:
-            expense_adjustment += adjust_expense_amounts[i]
-            
-    return expense_adjustment
+    """Get expense adjustment for the current year (or an array of years)"""
+    return sum_events_by_year(adjust_expense_years, adjust_expense_amounts, current_year)
 
 
 def calculate_one_time_expense(one_time_years, one_time_amounts, current_year):
-    """Calculate one-time expenses for the current year"""
-    one_time_expense = 0
-    
-    for i in range(len(one_time_years)):
-        if one_time_years[i] == current_year:
-            one_time_expense += one_time_amounts[i]
-            
-    return one_time_expense
-
-
-def convert_to_dict_for_display(cash_flow_entry):
-    """Convert a YearlyCashFlow object to a dictionary for display/visualization"""
-    return {
-        'Year': cash_flow_entry.year,
-        'Self Age': cash_flow_entry.self_age,
-        'Partner Age': cash_flow_entry.partner_age,
-        'Beginning Portfolio Value': cash_flow_entry.beginning_balance,
-        'Gross Earnings': cash_flow_entry.income.total,
-        'Total Expense': cash_flow_entry.expenses.total,
-        'Tax': cash_flow_entry.tax,
-        'Portfolio Draw': cash_flow_entry.portfolio_draw,
-        'Investment Return': cash_flow_entry.investment_return.total,
-        'Ending Portfolio Value': cash_flow_entry.ending_balance,
-        'At Constant Currency': cash_flow_entry.end_value_constant_currency,
-        'Downsize Proceeds': cash_flow_entry.downsize_proceeds,
-        'Investment Return %': cash_flow_entry.investment_return.return_rate,
-        'Drawdown %': cash_flow_entry.portfolio_draw / cash_flow_entry.ending_balance if cash_flow_entry.ending_balance > 0 else 0,
-        'Self Gross Earning': cash_flow_entry.income.self_earnings,
-        'Partner Gross Earning': cash_flow_entry.income.partner_earnings,
-        'Self Social Security': cash_flow_entry.income.self_social_security,
-        'Partner Social Security': cash_flow_entry.income.partner_social_security,
-        'Combined Social Security': cash_flow_entry.income.self_social_security + cash_flow_entry.income.partner_social_security,
-        'Self Pension': cash_flow_entry.income.self_pension,
-        'Partner Pension': cash_flow_entry.income.partner_pension,
-        'Rental Income': cash_flow_entry.income.rental,
-        'Mortgage': cash_flow_entry.expenses.mortgage,
-        'Healthcare Expense': cash_flow_entry.expenses.self_healthcare + cash_flow_entry.expenses.partner_healthcare,
-        'Self Health Expense': cash_flow_entry.expenses.self_healthcare,
-        'Partner Health Expense': cash_flow_entry.expenses.partner_healthcare,
-        'Yearly Expense Adj': cash_flow_entry.expense_adjustment,
-        'One Time Expense': cash_flow_entry.expenses.one_time,
-        'Windfall Amt': cash_flow_entry.windfall_amount,
-        'Self 401K Contribution': cash_flow_entry.contributions[0],
-        'Self 401K Return': cash_flow_entry.investment_return.self_401k,
-        'Self 401K Draw': cash_flow_entry.draws.self_401k,
-        'Self 401K Balance': cash_flow_entry.account_balances.self_401k,
-        'Partner 401K Contribution': cash_flow_entry.contributions[1],
-        'Partner 401K Return': cash_flow_entry.investment_return.partner_401k,
-        'Partner 401K Draw': cash_flow_entry.draws.partner_401k,
-        'Partner 401K Balance': cash_flow_entry.account_balances.partner_401k,
-        'Roth IRA Return': cash_flow_entry.investment_return.roth_ira,
-        'Roth IRA Draw': cash_flow_entry.draws.roth_ira,
-        'Roth IRA Balance': cash_flow_entry.account_balances.roth_ira,
-        'Brokerage Acct Return': cash_flow_entry.investment_return.brokerage,
-        'Brokerage Draw': cash_flow_entry.draws.brokerage,
-        'Brokerage Acct Balance': cash_flow_entry.account_balances.brokerage,
-        'Cash Return': cash_flow_entry.investment_return.cash,
-        'Cash Draw': cash_flow_entry.draws.cash,
-        'Cash Balance': cash_flow_entry.account_balances.cash,
-        'Total Acct Balance': cash_flow_entry.account_balances.total,
-        'Simulation ID': cash_flow_entry.simulation_id
-    }
+    """Calculate one-time expenses for the current year (or an array of years)"""
+    return sum_events_by_year(one_time_years, one_time_amounts, current_year)
+